@@ -454,13 +454,15 @@ class TwitterBot:
     def check_whale_alert(self):
         """Enhanced whale alert checking"""
         try:
-            alerts = self.whale_tracker.monitor_transactions()
+            alerts = list(self.whale_tracker.iter_whale_transactions(max_polls=1))
             
             if alerts:
-                for alert in alerts:
+                for whale_tx in alerts:
+                    alert = self.whale_tracker.print_transaction(whale_tx)
+                    
                     # Identify exchanges in the transaction
-                    from_exchange = self.identify_exchange(alert.get('from_address', ''))
-                    to_exchange = self.identify_exchange(alert.get('to_address', ''))
+                    from_exchange = self.identify_exchange(whale_tx.get('sender', ''))
+                    to_exchange = self.identify_exchange(whale_tx.get('receiver', ''))
                     
                     # Format alert based on exchange identification
                     if from_exchange['confidence'] != 'low' or to_exchange['confidence'] != 'low':
@@ -0,0 +1,93 @@
+# -*- coding: UTF-8 -*-
+import re
+from types import MappingProxyType
+
+
+class AddressIndex:
+    """Precompiled address-to-entity lookup built once from the label databases"""
+
+    def __init__(self, known_addresses, exchange_identifiers=None):
+        # Exact matches: lowercase address -> (entity, type), first entity wins
+        exact = {}
+        for entity, info in known_addresses.items():
+            for address in info['addresses']:
+                exact.setdefault(address.lower(), (entity, info['type']))
+        self.exact = MappingProxyType(exact)
+
+        # Exchange identifiers keep their declaration order as priority
+        self.exchanges = []
+        self.prefix_trie = {}
+        self.pattern_regex = None
+
+        if exchange_identifiers:
+            self._build_exchange_matchers(exchange_identifiers)
+
+    def _build_exchange_matchers(self, exchange_identifiers):
+        """Compile every prefix into one trie and every pattern into one regex"""
+        alternatives = []
+        for order, (exchange, info) in enumerate(exchange_identifiers.items()):
+            self.exchanges.append((exchange, info['type']))
+
+            for prefix in info.get('prefixes', []):
+                node = self.prefix_trie
+                for char in prefix.lower():
+                    node = node.setdefault(char, {})
+                # Only the highest priority exchange needs to be remembered
+                node.setdefault(None, order)
+
+            patterns = info.get('patterns', [])
+            if patterns:
+                # Each alternative looks ahead over the whole address, so the
+                # first alternative that matches is the first exchange listed
+                combined = '|'.join(f'(?:{pattern})' for pattern in patterns)
+                alternatives.append(f'(?=[\\s\\S]*?(?:{combined}))(?P<e{order}>)')
+
+        if alternatives:
+            self.pattern_regex = re.compile(
+                '^(?:' + '|'.join(alternatives) + ')',
+                re.IGNORECASE
+            )
+
+    def lookup(self, address):
+        """Return (entity, type) for an exact known address, or None"""
+        if not address:
+            return None
+        return self.exact.get(address.lower())
+
+    def lookup_many(self, addresses):
+        """Bulk exact lookup preserving input order"""
+        exact = self.exact
+        return [exact.get(address.lower()) if address else None for address in addresses]
+
+    def _prefix_order(self, address):
+        """Lowest exchange order whose prefix starts the address"""
+        best = None
+        node = self.prefix_trie
+        for char in address:
+            node = node.get(char)
+            if node is None:
+                break
+            order = node.get(None)
+            if order is not None and (best is None or order < best):
+                best = order
+        return best
+
+    def _pattern_order(self, address):
+        """Lowest exchange order with a pattern matching the address"""
+        if self.pattern_regex is None:
+            return None
+        match = self.pattern_regex.match(address)
+        if not match:
+            return None
+        return int(match.lastgroup[1:])
+
+    def match_exchange(self, address):
+        """Return (exchange, type) for the first exchange matching by prefix or pattern"""
+        address = address.lower()
+        prefix_order = self._prefix_order(address)
+        pattern_order = self._pattern_order(address)
+
+        orders = [order for order in (prefix_order, pattern_order) if order is not None]
+        if not orders:
+            return None
+        return self.exchanges[min(orders)]
@@ -0,0 +1,149 @@
+# -*- coding: UTF-8 -*-
+import asyncio
+import logging
+
+
+class AlertEngine:
+    """Run the BTC and ETH trackers and the price bar fetchers on one event loop.
+
+    Every source runs as its own task; blocking HTTP calls go through
+    ``asyncio.to_thread`` on the shared pooled session, so one slow API
+    never stalls the others. Alerts flow to a single poster task through
+    an ``asyncio.Queue``.
+    """
+
+    def __init__(self, post, btc_tracker=None, eth_tracker=None, price_bars=None,
+                 btc_interval=30, eth_interval=5, post_delay=0, queue_size=100,
+                 alert_filter=None, dispatch=None, mempool_interval=None, btc_feed=None,
+                 record_filter=None):
+        self.post = post                    # callable(message), blocking
+        self.dispatch = dispatch            # callable(message, item), non-blocking; replaces the poster task
+        self.alert_filter = alert_filter    # callable(message) -> bool, for whale alerts
+        self.record_filter = record_filter  # callable(item) -> bool, checked before formatting
+        self.btc_tracker = btc_tracker
+        self.eth_tracker = eth_tracker
+        self.price_bars = price_bars or []  # list of (callable, interval seconds); callables return one status or a list
+        self.btc_interval = btc_interval
+        self.eth_interval = eth_interval
+        self.mempool_interval = mempool_interval  # poll btc_tracker's mempool too when set
+        self.btc_feed = btc_feed                  # blocking iterable of BTC whale records, replaces polling
+        self.post_delay = post_delay        # seconds between posts
+        self.queue_size = queue_size
+        self.queue = None
+        self.logger = logging.getLogger('AlertEngine')
+
+    async def _poll(self, name, fetch, format_alert, interval, use_filter=True):
+        """Call ``fetch`` every ``interval`` seconds and queue formatted alerts"""
+        while True:
+            try:
+                items = await asyncio.to_thread(fetch)
+                for item in items or []:
+                    await self._emit(format_alert, item, use_filter)
+            except Exception as e:
+                self.logger.error(f"Error in {name} task: {e}")
+            await asyncio.sleep(interval)
+
+    async def _stream(self, name, feed, format_alert, retry_interval=30):
+        """Queue alerts from a blocking iterable (e.g. a PushFeed) as items arrive.
+
+        A feed that raises (or unexpectedly runs out) is iterated again after
+        ``retry_interval`` seconds; a PushFeed resumes from its checkpoint.
+        """
+        while True:
+            iterator = iter(feed)
+            try:
+                while True:
+                    item = await asyncio.to_thread(next, iterator, None)
+                    if item is None:
+                        self.logger.error(f"{name} ended unexpectedly, restarting")
+                        break
+                    try:
+                        await self._emit(format_alert, item)
+                    except Exception as e:
+                        self.logger.error(f"Error in {name} task: {e}")
+            except Exception as e:
+                self.logger.error(f"Error in {name} task: {e}")
+            await asyncio.sleep(retry_interval)
+
+    async def _emit(self, format_alert, item, use_filter=True):
+        """Filter and format an alert, then hand it to the dispatcher or poster queue.
+
+        Formatting and dispatch may block (e.g. a price lookup on a cache
+        miss), so they run in a worker thread instead of on the event loop.
+        """
+        message = await asyncio.to_thread(self._prepare, format_alert, item, use_filter)
+        if message:
+            await self.queue.put(message)
+
+    def _prepare(self, format_alert, item, use_filter):
+        """Filter and format an alert; returns it if it still needs queueing"""
+        if use_filter and self.record_filter and not self.record_filter(item):
+            return None
+        message = format_alert(item)
+        if not message:
+            return None
+        if use_filter and self.alert_filter and not self.alert_filter(message):
+            return None
+        if self.dispatch:
+            self.dispatch(message, item)
+            return None
+        return message
+
+    async def _price_bar(self, fetch, interval):
+        """Queue the price bar(s) returned by ``fetch`` every ``interval`` seconds"""
+        def fetch_all():
+            statuses = fetch()
+            return statuses if isinstance(statuses, list) else [statuses]
+
+        await self._poll(getattr(fetch, '__name__', 'price bar'),
+                         fetch_all, lambda status: status, interval,
+                         use_filter=False)
+
+    async def _poster(self):
+        """Post queued alerts one at a time"""
+        while True:
+            message = await self.queue.get()
+            try:
+                await asyncio.to_thread(self.post, message)
+            except Exception as e:
+                self.logger.error(f"Error posting alert: {e}")
+            finally:
+                self.queue.task_done()
+            if self.post_delay:
+                await asyncio.sleep(self.post_delay)
+
+    def tasks(self):
+        """Coroutines for every configured source plus the poster"""
+        coroutines = [] if self.dispatch else [self._poster()]
+        if self.btc_tracker and self.btc_feed is not None:
+            coroutines.append(self._stream(
+                'BTC feed', self.btc_feed, self.btc_tracker.print_transaction
+            ))
+        elif self.btc_tracker:
+            coroutines.append(self._poll(
+                'BTC', self.btc_tracker.check_new_block,
+                self.btc_tracker.print_transaction, self.btc_interval
+            ))
+            if self.mempool_interval:
+                coroutines.append(self._poll(
+                    'BTC mempool', self.btc_tracker.check_mempool,
+                    self.btc_tracker.print_transaction, self.mempool_interval
+                ))
+        if self.eth_tracker:
+            coroutines.append(self._poll(
+                'ETH', self.eth_tracker.check_new_transfers,
+                self.eth_tracker.format_transfer_message, self.eth_interval
+            ))
+        for fetch, interval in self.price_bars:
+            coroutines.append(self._price_bar(fetch, interval))
+        return coroutines
+
+    async def run(self):
+        """Run all tasks until cancelled"""
+        self.queue = asyncio.Queue(maxsize=self.queue_size)
+        self.logger.info("Starting alert engine...")
+        await asyncio.gather(*self.tasks())
+
+    def start(self):
+        """Blocking entry point"""
+        asyncio.run(self.run())
@@ -0,0 +1,125 @@
+# -*- coding: UTF-8 -*-
+"""Compact whale alert records shared by the BTC and stablecoin pipelines."""
+from datetime import datetime
+
+from amounts import to_float
+
+
+class Entity:
+    """Known owner of an address. Instances are interned: use ``get_entity``."""
+
+    __slots__ = ('name', 'type')
+
+    def __init__(self, name, type):
+        self.name = name
+        self.type = type
+
+    def __getitem__(self, key):
+        # Entities used to be dicts; keep entity['name'] working
+        try:
+            return getattr(self, key)
+        except AttributeError:
+            raise KeyError(key) from None
+
+    def get(self, key, default=None):
+        return getattr(self, key, default)
+
+    def __repr__(self):
+        return f"Entity({self.name!r}, {self.type!r})"
+
+
+_entities = {}
+
+
+def get_entity(name, type):
+    """The single shared Entity for (name, type)"""
+    key = (name, type)
+    entity = _entities.get(key)
+    if entity is None:
+        entity = _entities.setdefault(key, Entity(name, type))
+    return entity
+
+
+def as_entity(info):
+    """Intern an identify_address() result (dict, Entity or None)"""
+    if info is None or isinstance(info, Entity):
+        return info
+    return get_entity(info['name'], info.get('type'))
+
+
+class AlertRecord:
+    """One whale movement: a BTC transaction or a token transfer.
+
+    Amounts are integer base units of ``token`` (satoshis for BTC). Human
+    amounts and the formatted timestamp are derived on access. Records
+    also answer the keys of the dicts they replace (``tx['btc_volume']``,
+    ``transfer['from']``, ...).
+    """
+
+    __slots__ = ('token', 'tx_hash', 'time', 'sender', 'receiver', 'value', 'fee',
+                 'log_index', 'block', 'tx_type', 'from_entity', 'to_entity',
+                 'input_count', 'output_count', 'unconfirmed')
+
+    _ALIASES = {
+        'hash': 'tx_hash',
+        'transaction_hash': 'tx_hash',
+        'from': 'sender',
+        'to': 'receiver',
+        'value_sats': 'value',
+        'fee_sats': 'fee',
+    }
+
+    def __init__(self, token, tx_hash, time, sender, receiver, value, fee=None,
+                 log_index=None, block=None, tx_type=None, from_entity=None, to_entity=None,
+                 input_count=None, output_count=None, unconfirmed=False):
+        self.token = token
+        self.tx_hash = tx_hash
+        self.time = time                # unix seconds
+        self.sender = sender
+        self.receiver = receiver
+        self.value = value              # base units
+        self.fee = fee                  # base units, when known
+        self.log_index = log_index
+        self.block = block
+        self.tx_type = tx_type
+        self.from_entity = as_entity(from_entity)
+        self.to_entity = as_entity(to_entity)
+        self.input_count = input_count
+        self.output_count = output_count
+        self.unconfirmed = unconfirmed  # seen in the mempool, not yet mined
+
+    @property
+    def amount(self):
+        return to_float(self.value, self.token)
+
+    @property
+    def btc_volume(self):
+        return round(self.amount, 4)
+
+    @property
+    def fee_btc(self):
+        return to_float(self.fee or 0, self.token)
+
+    @property
+    def timestamp(self):
+        return datetime.fromtimestamp(self.time).strftime('%Y-%m-%d %H:%M:%S')
+
+    def __getitem__(self, key):
+        try:
+            return getattr(self, self._ALIASES.get(key, key))
+        except AttributeError:
+            raise KeyError(key) from None
+
+    def get(self, key, default=None):
+        """Like dict.get; unset (None) fields count as missing"""
+        try:
+            value = self[key]
+        except KeyError:
+            return default
+        return default if value is None else value
+
+    def to_dict(self):
+        return {name: getattr(self, name) for name in self.__slots__}
+
+    def __repr__(self):
+        return f"AlertRecord({self.token} {self.tx_hash} {self.amount:,.4f})"
@@ -0,0 +1,46 @@
+# -*- coding: UTF-8 -*-
+"""Token amounts as integer base units (satoshis, wei, ...) plus a decimals registry.
+
+Thresholds are converted to base units once and compared as ints, so the
+hot loops never parse or divide floats. Conversion to human units only
+happens for records that are actually displayed.
+"""
+from decimal import Decimal
+
+# token symbol: number of decimals of its base unit
+TOKEN_DECIMALS = {
+    'BTC': 8,
+    'ETH': 18,
+    'USDT': 6,
+    'USDC': 6,
+    'DAI': 18,
+}
+
+
+def decimals_of(token):
+    try:
+        return TOKEN_DECIMALS[token.upper()]
+    except KeyError:
+        raise ValueError(f"Unknown token decimals: {token}") from None
+
+
+def register_token(token, decimals):
+    """Add or override the decimals of a token"""
+    TOKEN_DECIMALS[token.upper()] = int(decimals)
+
+
+def to_base_units(amount, token):
+    """Exact base units of a human amount (int, str, Decimal or float)"""
+    if isinstance(amount, float):
+        amount = repr(amount)  # shortest repr, so 0.1 stays 0.1
+    return int(Decimal(amount).scaleb(decimals_of(token)))
+
+
+def to_decimal(units, token):
+    """Exact human amount of ``units`` base units"""
+    return Decimal(units).scaleb(-decimals_of(token))
+
+
+def to_float(units, token):
+    """Human amount as a float, for display and USD estimates only"""
+    return units / 10 ** decimals_of(token)
@@ -0,0 +1,141 @@
+# -*- coding: UTF-8 -*-
+"""Micro-benchmarks for the hot paths of the monitors.
+
+Run with: python benchmarks.py
+"""
+import random
+import threading
+import time
+import timeit
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from address_index import AddressIndex
+
+
+def _random_eth_address(rng):
+    return '0x' + ''.join(rng.choice('0123456789abcdefABCDEF') for _ in range(40))
+
+
+def bench_usdt_identify(sizes=(100, 1000, 10000, 100000), lookups=10000):
+    """Address lookup cost as the label set grows (should stay flat)"""
+    rng = random.Random(42)
+    print("USDT identify_many: label set size vs cost per lookup")
+    for size in sizes:
+        known_addresses = {
+            f'entity_{i}': {
+                'type': 'exchange',
+                'addresses': [_random_eth_address(rng) for _ in range(10)]
+            }
+            for i in range(size // 10)
+        }
+        index = AddressIndex(known_addresses)
+
+        labeled = [addr for info in known_addresses.values() for addr in info['addresses']]
+        batch = [rng.choice(labeled) if i % 2 else _random_eth_address(rng) for i in range(lookups)]
+
+        seconds = min(timeit.repeat(lambda: index.lookup_many(batch), number=1, repeat=5))
+        print(f"  {size:>7,} addresses: {seconds / lookups * 1e9:8.1f} ns/lookup")
+
+
+def _synthetic_block(rng, tx_count, known):
+    """rawblock-shaped transactions with a few large exchange consolidations"""
+    transactions = []
+    for i in range(tx_count):
+        consolidation = i % 500 == 0
+        input_count = 300 if consolidation else rng.randint(1, 3)
+        inputs = [
+            {'prev_out': {
+                'addr': rng.choice(known) if consolidation else f'1addr{rng.randrange(10 ** 6)}',
+                'value': rng.randint(10 ** 8, 10 ** 9) if consolidation else rng.randint(10 ** 4, 10 ** 8)
+            }}
+            for _ in range(input_count)
+        ]
+        total = sum(inp['prev_out']['value'] for inp in inputs)
+        outputs = [
+            {'addr': f'3out{rng.randrange(10 ** 6)}', 'value': total // 2},
+            {'addr': inputs[0]['prev_out']['addr'], 'value': total // 2 - 1000}
+        ]
+        transactions.append({'hash': f'{i:064x}', 'time': 1700000000, 'inputs': inputs, 'out': outputs})
+    return transactions
+
+
+def bench_process_block(tx_count=4000):
+    """Time to classify every input and output of a full block"""
+    from btc_monitor import BitcoinWhaleTracker
+
+    rng = random.Random(42)
+    tracker = BitcoinWhaleTracker(min_btc=1000)
+    known = tracker.known_addresses['binance']['addresses']
+    transactions = _synthetic_block(rng, tx_count, known)
+
+    seconds = min(timeit.repeat(lambda: tracker.process_block(transactions), number=1, repeat=5))
+    whales = tracker.process_block(transactions)
+    print(f"process_block: {tx_count:,} txs in {seconds * 1000:.1f} ms ({len(whales)} whales)")
+
+
+class _StubHandler(BaseHTTPRequestHandler):
+    """Keep-alive stub answering every GET like /latestblock"""
+    protocol_version = 'HTTP/1.1'
+    disable_nagle_algorithm = True
+
+    def do_GET(self):
+        body = b'{"hash": "00000000", "height": 1}'
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+def bench_http_pooling(polls=200):
+    """Per-poll latency of bare requests.get vs the pooled shared session"""
+    import requests
+    import http_client
+
+    server = ThreadingHTTPServer(('127.0.0.1', 0), _StubHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    url = f"http://127.0.0.1:{server.server_address[1]}/latestblock"
+
+    try:
+        for name, fetch in (('requests.get', requests.get), ('http_client.get', http_client.get)):
+            fetch(url).json()  # warm up
+            start = time.perf_counter()
+            for _ in range(polls):
+                fetch(url).json()
+            elapsed = time.perf_counter() - start
+            print(f"{name:>16}: {elapsed / polls * 1000:.3f} ms/poll")
+    finally:
+        server.shutdown()
+
+
+def bench_checkpoint_writes(writes=2000):
+    """Cost of one cursor write and one alerted-hash write"""
+    import os
+    import tempfile
+    from checkpoint_store import CheckpointStore
+
+    with tempfile.TemporaryDirectory() as directory:
+        start = time.perf_counter()
+        store = CheckpointStore(os.path.join(directory, 'bench.db'))
+        print(f"checkpoint open: {(time.perf_counter() - start) * 1000:.2f} ms")
+
+        start = time.perf_counter()
+        for height in range(writes):
+            store.set_cursor('btc', height, f'{height:064x}')
+        print(f"set_cursor: {(time.perf_counter() - start) / writes * 1e6:.1f} us/write")
+
+        start = time.perf_counter()
+        for height in range(writes):
+            store.mark_alerted('btc', f'{height:064x}')
+        print(f"mark_alerted: {(time.perf_counter() - start) / writes * 1e6:.1f} us/write")
+        store.close()
+
+
+if __name__ == "__main__":
+    bench_usdt_identify()
+    bench_process_block()
+    bench_http_pooling()
+    bench_checkpoint_writes()
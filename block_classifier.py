@@ -0,0 +1,103 @@
+# -*- coding: UTF-8 -*-
+from array import array
+from collections import defaultdict
+
+
+class FlatBlock:
+    """Every input and output of a block flattened into parallel arrays.
+
+    Transactions are stored contiguously, so the inputs of transaction ``i``
+    live at ``in_start[i]:in_start[i + 1]`` (same for outputs). Addresses are
+    interned to integer ids; ``addresses[id]`` gives the address back.
+    """
+
+    def __init__(self):
+        self.tx_hashes = []
+        self.tx_times = array('q')
+        self.in_start = array('l', [0])
+        self.out_start = array('l', [0])
+        self.in_addr = array('l')
+        self.in_value = array('q')
+        self.out_addr = array('l')
+        self.out_value = array('q')
+        self.addresses = []
+        self.address_ids = {}
+
+    @property
+    def tx_count(self):
+        return len(self.tx_hashes)
+
+    def _intern(self, address):
+        address_id = self.address_ids.get(address)
+        if address_id is None:
+            address_id = len(self.addresses)
+            self.address_ids[address] = address_id
+            self.addresses.append(address)
+        return address_id
+
+    def add_transaction(self, tx):
+        """Append one blockchain.info transaction to the arrays"""
+        intern = self._intern
+        for inp in tx.get('inputs', []):
+            prev_out = inp.get('prev_out') or {}
+            self.in_addr.append(intern(prev_out.get('addr', 'Unknown')))
+            self.in_value.append(prev_out.get('value', 0))
+        for out in tx.get('out', []):
+            self.out_addr.append(intern(out.get('addr', 'Unknown')))
+            self.out_value.append(out.get('value', 0))
+
+        self.tx_hashes.append(tx.get('hash', 'Unknown'))
+        self.tx_times.append(tx.get('time', 0))
+        self.in_start.append(len(self.in_addr))
+        self.out_start.append(len(self.out_addr))
+
+    def tx_totals(self):
+        """Total input and output value (satoshis) of every transaction"""
+        in_value, out_value = self.in_value, self.out_value
+        in_start, out_start = self.in_start, self.out_start
+        inputs = array('q', (sum(in_value[in_start[i]:in_start[i + 1]]) for i in range(self.tx_count)))
+        outputs = array('q', (sum(out_value[out_start[i]:out_start[i + 1]]) for i in range(self.tx_count)))
+        return inputs, outputs
+
+    def tx_flows(self, index):
+        """Per address (input value, output value) for a single transaction"""
+        flows = defaultdict(lambda: [0, 0])
+        start, end = self.in_start[index], self.in_start[index + 1]
+        for address_id, value in zip(self.in_addr[start:end], self.in_value[start:end]):
+            flows[address_id][0] += value
+        start, end = self.out_start[index], self.out_start[index + 1]
+        for address_id, value in zip(self.out_addr[start:end], self.out_value[start:end]):
+            flows[address_id][1] += value
+        return flows
+
+    def dominant_parties(self, index):
+        """Address ids sending and receiving the most value in a transaction.
+
+        Outputs returning to one of the input addresses are treated as change
+        and only used as receiver when nothing else was paid out.
+        """
+        flows = self.tx_flows(index)
+        senders = [(sent, address_id) for address_id, (sent, _) in flows.items() if sent]
+        receivers = [(received, address_id) for address_id, (sent, received) in flows.items()
+                     if received and not sent]
+        if not receivers:
+            receivers = [(received, address_id) for address_id, (_, received) in flows.items() if received]
+
+        sender = max(senders)[1] if senders else None
+        receiver = max(receivers)[1] if receivers else None
+        return sender, receiver
+
+    def input_count(self, index):
+        return self.in_start[index + 1] - self.in_start[index]
+
+    def output_count(self, index):
+        return self.out_start[index + 1] - self.out_start[index]
+
+
+def flatten_block(transactions):
+    """Flatten an iterable of rawblock transactions in a single pass"""
+    block = FlatBlock()
+    for tx in transactions:
+        block.add_transaction(tx)
+    return block
+
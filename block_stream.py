@@ -0,0 +1,112 @@
+# -*- coding: UTF-8 -*-
+import codecs
+import json
+import re
+
+# JSON strings (possibly containing brackets), a lone quote of a string that
+# is still incomplete, or a structural bracket
+_TOKEN_RE = re.compile(r'"(?:[^"\\]|\\.)*"|"|[\[\]{}]')
+_TX_ARRAY_RE = re.compile(r'"tx"\s*:\s*\[')
+_VALUE_RE = re.compile(r'"value"\s*:\s*(\d+)')
+
+
+def _object_end(buffer, start):
+    """Index just past the object starting at ``start``, or None if incomplete"""
+    depth = 0
+    for match in _TOKEN_RE.finditer(buffer, start):
+        token = match.group()
+        if token == '"':
+            return None  # string continues in the next chunk
+        if token in '{[':
+            depth += 1
+        elif token in '}]':
+            depth -= 1
+            if depth == 0:
+                return match.end()
+    return None
+
+
+def _value_upper_bound(raw_tx):
+    """Sum of every ``value`` field in the raw tx text.
+
+    Input value can never exceed the sum of all input and output values,
+    so anything below the threshold here is safe to skip unparsed.
+    """
+    return sum(int(value) for value in _VALUE_RE.findall(raw_tx))
+
+
+def watch_pattern(addresses):
+    """Regex finding any of ``addresses`` as a JSON string in raw tx text"""
+    return re.compile('"(?:' + '|'.join(map(re.escape, addresses)) + ')"')
+
+
+def _keep(raw_tx, min_value, watch):
+    if not min_value:
+        return True
+    upper_bound = _value_upper_bound(raw_tx)
+    if upper_bound >= min_value:
+        return True
+    return (watch is not None and upper_bound >= watch[1]
+            and watch[0].search(raw_tx) is not None)
+
+
+def iter_block_json(chunks, min_value=0, watch=None):
+    """Yield the transactions of a rawblock JSON document incrementally.
+
+    ``chunks`` is an iterable of text chunks. Only one transaction is
+    materialized at a time, and transactions whose total input value
+    (in satoshis) is certainly below ``min_value`` are skipped without
+    being parsed. ``watch`` is an optional (pattern, min_value) pair:
+    smaller transactions whose raw text matches the pattern (see
+    ``watch_pattern``) are kept down to that lower threshold.
+    """
+    buffer = ''
+    position = None  # index of the next tx array element, once found
+    chunks = iter(chunks)
+    exhausted = False
+
+    while True:
+        if position is None:
+            match = _TX_ARRAY_RE.search(buffer)
+            if match:
+                position = match.end()
+        else:
+            # Skip separators between array elements
+            while position < len(buffer) and buffer[position] in ' \t\r\n,':
+                position += 1
+            if position < len(buffer):
+                if buffer[position] == ']':
+                    return
+                end = _object_end(buffer, position)
+                if end is not None:
+                    raw_tx = buffer[position:end]
+                    position = end
+                    if _keep(raw_tx, min_value, watch):
+                        yield json.loads(raw_tx)
+                    continue
+
+        if exhausted:
+            return
+
+        # Drop what has been consumed and read more data
+        if position is None:
+            buffer = buffer[-16:]  # keep a possible partial '"tx": [' match
+        else:
+            buffer = buffer[position:]
+            position = 0
+        try:
+            buffer += next(chunks)
+        except StopIteration:
+            exhausted = True
+
+
+def iter_response_transactions(response, min_value=0, chunk_size=65536, watch=None):
+    """Stream the transactions of a ``requests`` response opened with stream=True"""
+    decoder = codecs.getincrementaldecoder('utf-8')()
+
+    def text_chunks():
+        for chunk in response.iter_content(chunk_size=chunk_size):
+            yield decoder.decode(chunk)
+        yield decoder.decode(b'', final=True)
+
+    return iter_block_json(text_chunks(), min_value, watch)
@@ -1,19 +1,48 @@
 # -*- coding: UTF-8 -*-
-import re
-import requests
+import http_client
 import time
 import os
+import threading
 from datetime import datetime
 from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from address_index import AddressIndex
+from block_classifier import flatten_block
+from block_stream import iter_response_transactions, watch_pattern
+from recent_set import RecentSet
+from amounts import to_base_units, to_float
+from price_oracle import get_price
+from alert_record import AlertRecord
 
 class BitcoinWhaleTracker:
-    def __init__(self, min_btc=1000):  # Changed from 500 to 1000
+    def __init__(self, min_btc=1000, checkpoint_store=None):  # Changed from 500 to 1000
         self.base_url = "https://blockchain.info"
         self.min_btc = min_btc
         self.satoshi_to_btc = 100000000
-        self.processed_blocks = set()  # Track processed blocks
+        self.fallback_btc_price = 96073.862  # USD, used until the price oracle answers
+        self.processed_blocks = RecentSet(1000)  # Track the last 1000 processed blocks
         self.last_block_height = None  # Track last block height
         
+        # Resume from the last persisted block, if any
+        self.checkpoint_store = checkpoint_store
+        if checkpoint_store:
+            cursor = checkpoint_store.get_cursor('btc')
+            if cursor:
+                self.last_block_height, last_hash = cursor
+                self.processed_blocks.add(last_hash)
+        self.catch_up_workers = 4  # Parallel block downloads when behind the tip
+        self.max_catch_up_blocks = 144  # Blocks processed per poll; a longer backlog takes several polls
+        
+        # Mempool mode: whales are alerted on broadcast, and again never once mined
+        self.mempool_url = f"{self.base_url}/unconfirmed-transactions?format=json"
+        self.alerted_txs = RecentSet(50000)  # tx hashes alerted from the mempool or a block
+        # Block and mempool checks may run on different threads (AlertEngine)
+        self.alert_lock = threading.Lock()  # guards alerted_txs and address_stats
+        
+        # Lower thresholds for specific addresses (e.g. Silk Road wallets); see watch_addresses
+        self.watched_addresses = {}  # address: min BTC
+        self.watch = None            # (pattern, min satoshis) for the block stream
+        
         # Stablecoin addresses for mint/burn detection
         self.stablecoin_addresses = {
            'usdt': {
@@ -466,65 +495,156 @@ class BitcoinWhaleTracker:
             }
         }
 
-    def get_latest_block(self):
-        """Get the latest block hash and ensure we don't process duplicates"""
+        # Precompiled lookup over both label databases
+        self.build_address_index()
+
+    def build_address_index(self):
+        """(Re)build the address index after the label databases change"""
+        self.address_index = AddressIndex(self.known_addresses, self.exchange_identifiers)
+
+    def watch_addresses(self, addresses, min_btc):
+        """Alert transactions touching ``addresses`` from ``min_btc`` instead of the global threshold"""
+        for address in addresses:
+            self.watched_addresses[address] = min_btc
+        self.watch = None
+        if self.watched_addresses:
+            self.watch = (watch_pattern(self.watched_addresses),
+                          to_base_units(min(self.watched_addresses.values()), 'BTC'))
+
+    def get_chain_tip(self):
+        """Get (height, hash) of the latest block, or None on error"""
         try:
-            response = requests.get(f"{self.base_url}/latestblock")
+            response = http_client.get(f"{self.base_url}/latestblock", api='blockchain_info')
             block_data = response.json()
-            current_height = block_data['height']
-            current_hash = block_data['hash']
-            
-            # If this is our first block, initialize
-            if self.last_block_height is None:
-                self.last_block_height = current_height
-                return current_hash
-                
-            # If we've seen this block already, return None
-            if current_hash in self.processed_blocks:
-                return None
-                
-             # If this is a new block
-            if current_height > self.last_block_height:
-                self.last_block_height = current_height
-                # Keep track of last 1000 blocks to manage memory
-                if len(self.processed_blocks) > 1000:
-                    self.processed_blocks.clear()
-                self.processed_blocks.add(current_hash)
-                print(f"\nNew Block: {current_height} | Hash: {current_hash[:8]}...")
-                return current_hash
-                
-            return None
-            
+            return block_data['height'], block_data['hash']
         except Exception as e:
             print(f"Error getting latest block: {e}")
             return None
 
-    def get_block_transactions(self, block_hash):
-        """Get all transactions in a block"""
+    def get_block_hash(self, height):
+        """Get the main chain block hash at a height"""
+        response = http_client.get(f"{self.base_url}/block-height/{height}", params={'format': 'json'}, api='blockchain_info')
+        response.raise_for_status()
+        blocks = response.json()['blocks']
+        for block in blocks:
+            if block.get('main_chain', True):
+                return block['hash']
+        return blocks[0]['hash']
+
+    def fetch_block(self, height, block_hash=None):
+        """Download the whale candidates of a block; returns (height, hash, txs) or None"""
         try:
-            response = requests.get(f"{self.base_url}/rawblock/{block_hash}")
-            return response.json()['tx']
+            block_hash = block_hash or self.get_block_hash(height)
+            return height, block_hash, list(self._stream_block(block_hash, self.min_btc))
         except Exception as e:
-            print(f"Error getting block transactions: {e}")
+            print(f"Error fetching block {height}: {e}")
+            return None
+
+    def catch_up(self, start_height, tip_height, tip_hash=None):
+        """Process the blocks from start_height towards tip_height, in order.
+
+        At most ``max_catch_up_blocks`` blocks are processed per call; the
+        rest of a longer backlog is left for the next polls. Blocks are
+        downloaded through a bounded thread pool, a window at a time, and
+        processed strictly in height order. Processing stops at the first
+        block that could not be fetched so the next poll retries it instead
+        of leaving a gap.
+        """
+        end_height = min(tip_height, start_height + self.max_catch_up_blocks - 1)
+        heights = list(range(start_height, end_height + 1))
+        if len(heights) > 1:
+            print(f"Catching up {len(heights)} blocks ({start_height} -> {end_height})...")
+        if end_height < tip_height:
+            print(f"{tip_height - end_height} more blocks behind the tip, continuing next poll")
+        
+        whale_txs = []
+        window = self.catch_up_workers * 2
+        with ThreadPoolExecutor(max_workers=self.catch_up_workers) as executor:
+            for offset in range(0, len(heights), window):
+                batch = heights[offset:offset + window]
+                fetched = executor.map(
+                    lambda height: self.fetch_block(height, tip_hash if height == tip_height else None),
+                    batch
+                )
+                for block in fetched:
+                    if block is None:
+                        return whale_txs
+                    whale_txs.extend(self._process_fetched_block(*block))
+        return whale_txs
+
+    def _process_fetched_block(self, height, block_hash, transactions):
+        """Process a downloaded block and advance the cursor"""
+        self.last_block_height = height
+        if block_hash in self.processed_blocks:
+            return []
+        
+        self.processed_blocks.add(block_hash)
+        print(f"\nNew Block: {height} | Hash: {block_hash[:8]}...")
+        whale_txs = self.process_block(transactions)
+        
+        # Drop alerts already sent from the mempool or before a restart
+        whale_txs = [whale_tx for whale_tx in whale_txs if self._mark_alerted(whale_tx.tx_hash)]
+        if self.checkpoint_store:
+            self.checkpoint_store.set_cursor('btc', height, block_hash)
+        return whale_txs
+
+    def _mark_alerted(self, tx_hash):
+        """True the first time a tx is alerted, whether seen in the mempool or a block"""
+        with self.alert_lock:
+            if not self.alerted_txs.add(tx_hash):
+                return False
+        if self.checkpoint_store:
+            return self.checkpoint_store.mark_alerted('btc', tx_hash)
+        return True
+
+    def get_mempool_transactions(self):
+        """Recent unconfirmed transactions, in the same format as rawblock's 'tx'"""
+        response = http_client.get(self.mempool_url, api='blockchain_info')
+        response.raise_for_status()
+        return response.json()['txs']
+
+    def check_mempool(self):
+        """Whale transactions in the mempool that were not alerted yet.
+
+        Uses the same threshold and classifier as confirmed blocks; the
+        alerted hashes make the block pipeline skip them once mined.
+        """
+        return self.process_unconfirmed(self.get_mempool_transactions())
+
+    def process_unconfirmed(self, transactions):
+        """Whale records for unconfirmed transactions (polled or pushed) not alerted yet"""
+        transactions = [tx for tx in transactions if tx.get('hash') not in self.alerted_txs]
+        if not transactions:
             return []
+        whale_txs = self._whale_records(flatten_block(transactions), unconfirmed=True)
+        return [whale_tx for whale_tx in whale_txs if self._mark_alerted(whale_tx.tx_hash)]
+
+    def _stream_block(self, block_hash, min_btc):
+        """Stream block transactions, raising on network errors"""
+        response = http_client.get(f"{self.base_url}/rawblock/{block_hash}", stream=True, api='blockchain_info')
+        with response:
+            response.raise_for_status()
+            yield from iter_response_transactions(response, to_base_units(min_btc, 'BTC'), watch=self.watch)
 
     def get_address_label(self, address):
         """Get the entity label for an address"""
-        for entity, info in self.known_addresses.items():
-            if address in info['addresses']:
-                return f"({entity.upper()} {info['type']})"
+        label = self.address_index.lookup(address)
+        if label:
+            entity, entity_type = label
+            return f"({entity.upper()} {entity_type})"
         return ""
 
     def update_address_stats(self, address, is_sender, btc_amount, timestamp):
         """Update statistics for an address"""
-        stats = self.address_stats[address]
-        if is_sender:
-            stats['sent_count'] += 1
-            stats['total_sent'] += btc_amount
-        else:
-            stats['received_count'] += 1
-            stats['total_received'] += btc_amount
-        stats['last_seen'] = timestamp
+        with self.alert_lock:
+            stats = self.address_stats[address]
+            if is_sender:
+                stats['sent_count'] += 1
+                stats['total_sent'] += btc_amount
+            else:
+                stats['received_count'] += 1
+                stats['total_received'] += btc_amount
+            stats['last_seen'] = timestamp
 
     def get_address_summary(self, address):
         """Get formatted summary of address activity"""
@@ -541,29 +661,31 @@ class BitcoinWhaleTracker:
             
         address = str(address).lower().strip()
         
-        # Check known exchanges first
-        for exchange, info in self.exchange_identifiers.items():
-            # Check prefixes
-            if any(address.startswith(prefix.lower()) for prefix in info['prefixes']):
-                return {
-                    'name': exchange,
-                    'type': info['type'],
-                    'confidence': 'high',
-                    'address': address
-                }
-            
-            # Check patterns
-            if any(re.search(pattern, address, re.IGNORECASE) for pattern in info['patterns']):
-                return {
-                    'name': exchange,
-                    'type': info['type'],
-                    'confidence': 'high',
-                    'address': address
-                }
+        # Check known exchanges first (prefix trie + combined pattern regex)
+        exchange = self.address_index.match_exchange(address)
+        if exchange:
+            return {
+                'name': exchange[0],
+                'type': exchange[1],
+                'confidence': 'high',
+                'address': address
+            }
         
         # Fall back to existing checks
         return self._fallback_address_check(address)
 
+    def _fallback_address_check(self, address):
+        """Look the address up in the known addresses database"""
+        label = self.address_index.lookup(address)
+        if not label:
+            return None
+        return {
+            'name': label[0],
+            'type': label[1],
+            'confidence': 'high',
+            'address': address
+        }
+
     def determine_transaction_type(self, sender, receiver):
         """Enhanced transaction type determination including stablecoin mints/burns"""
         
@@ -620,23 +742,61 @@ class BitcoinWhaleTracker:
                 'to_entity': None
             }
 
-    def process_transaction(self, tx):
-        """Process a single transaction and return if it meets criteria"""
-        # Calculate total input value
-        input_value = sum(inp.get('prev_out', {}).get('value', 0) for inp in tx.get('inputs', []))
-        btc_value = input_value / self.satoshi_to_btc
-        
-        # Only process transactions over minimum BTC threshold
-        if btc_value < self.min_btc:
-            return None
-            
-        # Get the primary sender (first input address)
-        sender = tx.get('inputs', [{}])[0].get('prev_out', {}).get('addr', 'Unknown')
+    def process_block(self, transactions):
+        """Classify every input and output of the given transactions in one pass.
+
+        Returns the whale transactions, attributed to the address sending
+        and receiving the most value. Blocks are streamed with the
+        below-threshold transactions already skipped, so there are no
+        block-wide flows to account here.
+        """
+        return self._whale_records(flatten_block(transactions))
+
+    def _whale_records(self, block, unconfirmed=False):
+        """AlertRecords for the transactions of a FlatBlock above the threshold"""
+        input_totals, output_totals = block.tx_totals()
+        min_satoshis = to_base_units(self.min_btc, 'BTC')
         
-        # Get the primary receiver (first output address)
-        receiver = tx.get('out', [{}])[0].get('addr', 'Unknown')
+        # Watched addresses present in this block: address id -> min satoshis
+        watched = {}
+        for address, min_btc in self.watched_addresses.items():
+            address_id = block.address_ids.get(address)
+            if address_id is not None:
+                watched[address_id] = to_base_units(min_btc, 'BTC')
         
-        timestamp = datetime.fromtimestamp(tx.get('time', 0))
+        whales = []
+        for index, input_value in enumerate(input_totals):
+            if input_value < min_satoshis:
+                threshold = self._watched_threshold(block, index, watched) if watched else None
+                if threshold is None or input_value < threshold:
+                    continue
+            if block.tx_hashes[index] in self.alerted_txs:
+                continue  # already alerted from the mempool
+            sender_id, receiver_id = block.dominant_parties(index)
+            sender = block.addresses[sender_id] if sender_id is not None else 'Unknown'
+            receiver = block.addresses[receiver_id] if receiver_id is not None else 'Unknown'
+            
+            whales.append(self._build_whale_record(
+                block.tx_hashes[index], block.tx_times[index],
+                sender, receiver, input_value, output_totals[index],
+                input_count=block.input_count(index),
+                output_count=block.output_count(index),
+                unconfirmed=unconfirmed
+            ))
+        return whales
+
+    @staticmethod
+    def _watched_threshold(block, index, watched):
+        """Lowest watched threshold among the addresses of a tx, or None"""
+        address_ids = set(block.in_addr[block.in_start[index]:block.in_start[index + 1]])
+        address_ids.update(block.out_addr[block.out_start[index]:block.out_start[index + 1]])
+        return min((watched[address_id] for address_id in address_ids & watched.keys()), default=None)
+
+    def _build_whale_record(self, tx_hash, tx_time, sender, receiver, input_value, output_value,
+                            input_count=None, output_count=None, unconfirmed=False):
+        """Build the AlertRecord for a transaction that passed the threshold"""
+        btc_value = to_float(input_value, 'BTC')
+        timestamp = datetime.fromtimestamp(tx_time)
         
         # Update address statistics
         self.update_address_stats(sender, True, btc_value, timestamp)
@@ -645,27 +805,23 @@ class BitcoinWhaleTracker:
         # Get transaction type and entities involved
         tx_info = self.determine_transaction_type(sender, receiver)
         
-        # Calculate fee
-        output_value = sum(out.get('value', 0) for out in tx.get('out', []))
-        fee = (input_value - output_value) / self.satoshi_to_btc
-        
-        return {
-            'timestamp': timestamp.strftime('%Y-%m-%d %H:%M:%S'),
-            'transaction_hash': tx.get('hash', 'Unknown'),
-            'sender': sender,
-            'receiver': receiver,
-            'btc_volume': round(btc_value, 4),
-            'fee_btc': round(fee, 8),
-            'tx_type': tx_info['type'],
-            'from_entity': tx_info['from_entity'],
-            'to_entity': tx_info['to_entity']
-        }
+        # Value and fee stay exact in satoshis; BTC figures are derived for display
+        return AlertRecord(
+            'BTC', tx_hash, tx_time, sender, receiver, input_value,
+            fee=input_value - output_value,
+            tx_type=tx_info['type'],
+            from_entity=tx_info['from_entity'],
+            to_entity=tx_info['to_entity'],
+            input_count=input_count,
+            output_count=output_count,
+            unconfirmed=unconfirmed
+        )
 
     def print_transaction(self, tx):
         """Format transaction alerts with clean exchange detection"""
         # Determine emoji based on type and amount
-        tx_type = tx['tx_type'].lower()
-        btc_amount = tx['btc_volume']
+        tx_type = tx.tx_type.lower()
+        btc_amount = tx.btc_volume
         
         # Enhanced emoji selection
         if '_mint' in tx_type:
@@ -681,17 +837,18 @@ class BitcoinWhaleTracker:
             emoji = "🚨" * emoji_count
 
         # Format amounts with commas
+        btc_price = get_price('BTC', self.fallback_btc_price)
         btc_formatted = f"{btc_amount:,.0f}"
-        usd_value = btc_amount * 96073.862
+        usd_value = btc_amount * btc_price
         usd_formatted = f"{usd_value:,.0f}"
         
         # Format fee
-        fee_sats = tx['fee_btc'] * 100000000
-        fee_usd = tx['fee_btc'] * 96073.862
+        fee_sats = tx.fee
+        fee_usd = tx.fee_btc * btc_price
         
         # Get entity names (lowercase)
-        from_entity = tx['from_entity']['name'].lower() if tx['from_entity'] else "unknown"
-        to_entity = tx['to_entity']['name'].lower() if tx['to_entity'] else "unknown"
+        from_entity = tx.from_entity.name.lower() if tx.from_entity else "unknown"
+        to_entity = tx.to_entity.name.lower() if tx.to_entity else "unknown"
         
         # List of major exchanges to track
         exchanges = ['coinbase', 'gemini', 'bybit', 'binance', 'kraken', 'bitfinex', 'okx', 'htx']
@@ -706,6 +863,9 @@ class BitcoinWhaleTracker:
             f"for {fee_sats:.2f} sats (${fee_usd:.0f}) fees"
         )
         
+        if tx.unconfirmed:
+            message += " (unconfirmed)"
+        
         # Add exchange transfer prefix if applicable
         if any(ex in from_entity or ex in to_entity for ex in exchanges):
             message = "💱 Exchange Transfer Alert:\n" + message
@@ -717,34 +877,79 @@ class BitcoinWhaleTracker:
         print(message)
         return message
 
-    def monitor_transactions(self):
-        """Main method to track whale transactions"""
-        print(f"Tracking Bitcoin transactions over {self.min_btc} BTC...")
-        print("Waiting for new blocks...")
+    def check_new_block(self):
+        """Process every block since the last one seen, returning their whale transactions"""
+        tip = self.get_chain_tip()
+        if tip is None:
+            return []
+        return self.on_new_tip(*tip)
+
+    def on_new_tip(self, tip_height, tip_hash):
+        """Process every block up to a tip learned by polling or push"""
+        # Nothing processed yet: start at the current tip
+        if self.last_block_height is None:
+            start_height = tip_height
+        elif tip_height > self.last_block_height:
+            start_height = self.last_block_height + 1
+        else:
+            return []
         
-        while True:
+        whale_txs = self.catch_up(start_height, tip_height, tip_hash)
+        print(f"Processed up to block {self.last_block_height}, found {len(whale_txs)} whale movements")
+        return whale_txs
+
+    def iter_whale_transactions(self, poll_interval=30, max_polls=None):
+        """Yield processed whale transactions as new blocks arrive.
+
+        The chain tip is checked every ``poll_interval`` seconds, forever
+        unless ``max_polls`` limits the number of checks.
+        """
+        polls = 0
+        while max_polls is None or polls < max_polls:
+            if polls:
+                time.sleep(poll_interval)
+            polls += 1
+            
             try:
-                block_hash = self.get_latest_block()
-                
-                if block_hash:
-                    transactions = self.get_block_transactions(block_hash)
-                    processed_count = 0
-                    whale_count = 0
-                    
-                    for tx in transactions:
-                        processed_count += 1
-                        whale_tx = self.process_transaction(tx)
-                        if whale_tx:
-                            whale_count += 1
-                            self.print_transaction(whale_tx)
-                    
-                    print(f"Processed {processed_count} transactions, found {whale_count} whale movements")
-                
-                time.sleep(30)  # Check every 30 seconds
-                
+                whale_txs = self.check_new_block()
             except Exception as e:
-                print(f"Error in main loop: {e}")
-                time.sleep(30)
+                print(f"Error checking for new blocks: {e}")
+                continue
+            
+            yield from whale_txs
+
+    def iter_mempool_transactions(self, poll_interval=5, max_polls=None):
+        """Yield whale transactions as they are broadcast, before they are mined"""
+        polls = 0
+        while max_polls is None or polls < max_polls:
+            if polls:
+                time.sleep(poll_interval)
+            polls += 1
+            
+            try:
+                whale_txs = self.check_mempool()
+            except Exception as e:
+                print(f"Error checking the mempool: {e}")
+                continue
+            
+            yield from whale_txs
+
+    def monitor_transactions(self, push=False):
+        """Main method to track whale transactions.
+
+        With ``push`` new blocks and mempool transactions arrive over the
+        blockchain.info WebSocket feed instead of polling /latestblock.
+        """
+        print(f"Tracking Bitcoin transactions over {self.min_btc} BTC...")
+        print("Waiting for new blocks...")
+        
+        if push:
+            from push_feed import PushFeed
+            whale_txs = PushFeed(self)
+        else:
+            whale_txs = self.iter_whale_transactions()
+        for whale_tx in whale_txs:
+            self.print_transaction(whale_tx)
 
     def is_exchange_address(self, address_info):
         """Improved exchange detection"""
@@ -0,0 +1,82 @@
+# -*- coding: UTF-8 -*-
+import sqlite3
+import threading
+import time
+
+
+class CheckpointStore:
+    """Durable per-chain cursors and recently alerted tx hashes.
+
+    Backed by a single SQLite file in WAL mode. Every write is one
+    autocommitted statement, so a crash leaves either the old or the new
+    checkpoint, never a torn one.
+    """
+
+    def __init__(self, path='checkpoints.db', max_alerted=10000):
+        self.path = path
+        self.max_alerted = max_alerted  # alerted hashes kept per chain
+        self.lock = threading.Lock()
+        self._inserts = 0
+
+        self.conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS cursors ("
+            " chain TEXT PRIMARY KEY, height INTEGER NOT NULL, block_hash TEXT, updated REAL)"
+        )
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS alerted ("
+            " chain TEXT NOT NULL, tx_hash TEXT NOT NULL, alerted REAL,"
+            " PRIMARY KEY (chain, tx_hash))"
+        )
+
+    def get_cursor(self, chain):
+        """Return (height, block_hash) of the last processed block, or None"""
+        with self.lock:
+            row = self.conn.execute(
+                "SELECT height, block_hash FROM cursors WHERE chain = ?", (chain,)
+            ).fetchone()
+        return tuple(row) if row else None
+
+    def set_cursor(self, chain, height, block_hash=None):
+        """Atomically replace the cursor of a chain"""
+        with self.lock:
+            self.conn.execute(
+                "INSERT OR REPLACE INTO cursors (chain, height, block_hash, updated) VALUES (?, ?, ?, ?)",
+                (chain, height, block_hash, time.time())
+            )
+
+    def was_alerted(self, chain, tx_hash):
+        with self.lock:
+            row = self.conn.execute(
+                "SELECT 1 FROM alerted WHERE chain = ? AND tx_hash = ?", (chain, tx_hash)
+            ).fetchone()
+        return row is not None
+
+    def mark_alerted(self, chain, tx_hash):
+        """Record an alert; returns False if this tx was already alerted"""
+        with self.lock:
+            cursor = self.conn.execute(
+                "INSERT OR IGNORE INTO alerted (chain, tx_hash, alerted) VALUES (?, ?, ?)",
+                (chain, tx_hash, time.time())
+            )
+            inserted = cursor.rowcount == 1
+            if inserted:
+                self._inserts += 1
+                # Trim occasionally rather than on every insert
+                if self._inserts % 100 == 0:
+                    self._prune(chain)
+        return inserted
+
+    def _prune(self, chain):
+        """Keep only the newest max_alerted hashes of a chain (lock held)"""
+        self.conn.execute(
+            "DELETE FROM alerted WHERE chain = ? AND rowid <= ("
+            " SELECT rowid FROM alerted WHERE chain = ? ORDER BY rowid DESC LIMIT 1 OFFSET ?)",
+            (chain, chain, self.max_alerted)
+        )
+
+    def close(self):
+        with self.lock:
+            self.conn.close()
@@ -0,0 +1,92 @@
+# -*- coding: UTF-8 -*-
+"""Shared HTTP client used by all monitors and price fetchers.
+
+One ``requests.Session`` keeps a keep-alive connection pool per host, so
+repeated polls of blockchain.info, Etherscan, mempool.space and CoinGecko
+reuse their TCP+TLS connections instead of reconnecting on every call.
+"""
+import threading
+import time
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+from rate_limiter import Backoff, get_limiter, parse_retry_after
+
+DEFAULT_TIMEOUT = 10  # seconds, applied when the caller does not pass one
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+DEFAULT_BACKOFF = Backoff(base=1, cap=60)
+
+_session = None
+_session_lock = threading.Lock()
+
+
+def build_session(pool_connections=10, pool_maxsize=10, retries=3, backoff_factor=0.5):
+    """Create a session with per-host connection pools.
+
+    The adapter only retries connection failures; retryable HTTP statuses
+    are handled by ``request`` so they go through the shared limiter.
+    """
+    retry = Retry(
+        total=retries,
+        backoff_factor=backoff_factor,
+        raise_on_status=False
+    )
+    adapter = HTTPAdapter(
+        pool_connections=pool_connections,  # number of hosts kept pooled
+        pool_maxsize=pool_maxsize,          # connections kept per host
+        max_retries=retry
+    )
+    session = requests.Session()
+    session.mount('https://', adapter)
+    session.mount('http://', adapter)
+    return session
+
+
+def get_session():
+    """Return the process-wide session, creating it on first use"""
+    global _session
+    if _session is None:
+        with _session_lock:
+            if _session is None:
+                _session = build_session()
+    return _session
+
+
+def request(method, url, api=None, max_retries=3, backoff=DEFAULT_BACKOFF, **kwargs):
+    """Send a request through the shared session.
+
+    When ``api`` names an entry of ``rate_limiter.API_LIMITS`` a token is
+    taken from that API's bucket before every attempt. 429 and 5xx
+    responses are retried with jittered exponential backoff, waiting
+    exactly as long as the server asks when it sends Retry-After. A
+    Retry-After longer than the backoff cap is not waited for: the
+    response is returned to the caller instead.
+    """
+    kwargs.setdefault('timeout', DEFAULT_TIMEOUT)
+    limiter = get_limiter(api) if api else None
+    
+    for attempt in range(max_retries + 1):
+        if limiter:
+            limiter.acquire()
+        response = get_session().request(method, url, **kwargs)
+        if response.status_code not in RETRY_STATUSES or attempt == max_retries:
+            return response
+        
+        retry_after = parse_retry_after(response.headers.get('Retry-After'))
+        if retry_after is not None and retry_after > backoff.cap:
+            return response
+        response.close()
+        time.sleep(backoff.delay(attempt, retry_after))
+    return response
+
+
+def get(url, **kwargs):
+    """GET through the shared session"""
+    return request('GET', url, **kwargs)
+
+
+def post(url, **kwargs):
+    """POST through the shared session"""
+    return request('POST', url, **kwargs)
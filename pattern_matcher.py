@@ -0,0 +1,67 @@
+# -*- coding: UTF-8 -*-
+from collections import deque
+
+
+class PatternMatcher:
+    """Aho-Corasick automaton over many literal patterns, each tagged with labels.
+
+    Matching is case-insensitive and a single pass over the text finds every
+    label whose patterns occur anywhere in it, however many patterns there
+    are. Labels are tracked as bits, so a node's output is one int.
+    """
+
+    def __init__(self, patterns):
+        """``patterns`` maps a label to an iterable of literal strings"""
+        self.labels = list(patterns)
+        self.goto = [{}]        # node: {char: next node}
+        self.fail = [0]
+        self.output = [0]       # node: bitmask of labels ending here
+
+        for bit, label in enumerate(self.labels):
+            for pattern in patterns[label]:
+                if pattern:
+                    self._add(pattern.lower(), 1 << bit)
+        self._link()
+
+    def _add(self, pattern, mask):
+        node = 0
+        for char in pattern:
+            next_node = self.goto[node].get(char)
+            if next_node is None:
+                next_node = len(self.goto)
+                self.goto[node][char] = next_node
+                self.goto.append({})
+                self.fail.append(0)
+                self.output.append(0)
+            node = next_node
+        self.output[node] |= mask
+
+    def _link(self):
+        """Breadth-first failure links; outputs inherit their fail node's"""
+        queue = deque(self.goto[0].values())
+        while queue:
+            node = queue.popleft()
+            for char, child in self.goto[node].items():
+                queue.append(child)
+                state = self.fail[node]
+                while state and char not in self.goto[state]:
+                    state = self.fail[state]
+                target = self.goto[state].get(char, 0)
+                self.fail[child] = target if target != child else 0
+                self.output[child] |= self.output[self.fail[child]]
+
+    def match_mask(self, text):
+        goto, fail, output = self.goto, self.fail, self.output
+        node = 0
+        mask = 0
+        for char in text.lower():
+            while node and char not in goto[node]:
+                node = fail[node]
+            node = goto[node].get(char, 0)
+            mask |= output[node]
+        return mask
+
+    def match(self, text):
+        """Labels found in ``text``, in the order the labels were given"""
+        mask = self.match_mask(text)
+        return [label for bit, label in enumerate(self.labels) if mask >> bit & 1]
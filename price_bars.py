@@ -0,0 +1,62 @@
+# -*- coding: UTF-8 -*-
+"""Price bar tweets for several assets from one batched price fetch."""
+from price_oracle import get_prices
+from progress_bar import get_bar
+
+# asset: display name, price target the bar fills up to (USD), pair shown under the bar
+PRICE_BAR_ASSETS = {
+    'BTC': {'name': 'Bitcoin', 'target': 1000000, 'ratio': ('ETH', 'BTC')},
+    'ETH': {'name': 'Ethereum', 'target': 10000, 'ratio': ('ETH', 'BTC')},
+    'SOL': {'name': 'Solana', 'target': 1000, 'ratio': ('SOL', 'ETH')},
+    'XRP': {'name': 'XRP', 'target': 10, 'ratio': ('XRP', 'BTC')},
+}
+
+
+def _direction(change):
+    if change is None:
+        return "↔ +0.00%"
+    arrow = "↑" if change > 0 else "↓" if change < 0 else "↔"
+    return f"{arrow} {change:+.2f}%"
+
+
+def _format_ratio(ratio):
+    return f"{ratio:.2f}" if ratio >= 0.01 else f"{ratio:.6f}"
+
+
+def build_price_bars(assets=('BTC', 'ETH'), width=10):
+    """Return {asset: status text} for ``assets``.
+
+    Prices, 24h changes and every ratio pair come from a single oracle
+    lookup; assets without a price are left out.
+    """
+    configs = [(asset, PRICE_BAR_ASSETS[asset]) for asset in assets]
+    keys = set()
+    for asset, config in configs:
+        keys.update((asset, f"{asset}_CHANGE"), config['ratio'])
+    prices = get_prices(sorted(keys))
+
+    # Work on whole columns: percent of target and ratio for every asset at once
+    priced = [(asset, config) for asset, config in configs
+              if prices.get(asset) and all(prices.get(symbol) for symbol in config['ratio'])]
+    values = [prices[asset] for asset, _ in priced]
+    percents = [value / config['target'] * 100 for value, (_, config) in zip(values, priced)]
+    ratios = [prices[config['ratio'][0]] / prices[config['ratio'][1]] for _, config in priced]
+
+    bar = get_bar(width)
+    bars = {}
+    for (asset, config), value, percent, ratio in zip(priced, values, percents, ratios):
+        base, quote = config['ratio']
+        bars[asset] = (
+            f"{config['name']} {_direction(prices.get(f'{asset}_CHANGE'))}\n\n"
+            f"{bar.render(percent)}\n\n"
+            f"${value:,.2f}        {base.lower()}/{quote.lower()}: {_format_ratio(ratio)}"
+        )
+    return bars
+
+
+def btc_price_bar():
+    return build_price_bars(['BTC']).get('BTC')
+
+
+def eth_price_bar():
+    return build_price_bars(['ETH']).get('ETH')
@@ -0,0 +1,196 @@
+# -*- coding: UTF-8 -*-
+"""Process-wide USD price cache shared by the monitors, reports and price bars.
+
+Prices are cached for ``ttl`` seconds. Concurrent misses for the same asset
+trigger a single fetch (single-flight); a price older than ``ttl`` but
+younger than ``max_stale`` is served immediately while one background
+refresh runs (stale-while-revalidate), and the last known price is served
+if a refresh fails. After a failed fetch a key is not fetched again for
+``retry_after`` seconds; lookups get the last known price or the default.
+
+Keys are asset symbols ('BTC', 'ETH'), '<SYMBOL>_VOLUME' for the 24h
+trading volume in USD or '<SYMBOL>_CHANGE' for the 24h price change in percent.
+"""
+import logging
+import threading
+import time
+
+import http_client
+
+MEMPOOL_PRICES_API = "https://mempool.space/api/v1/prices"
+COINGECKO_SIMPLE_PRICE_API = "https://api.coingecko.com/api/v3/simple/price"
+
+# asset symbol: CoinGecko coin id
+COINGECKO_IDS = {
+    'BTC': 'bitcoin',
+    'ETH': 'ethereum',
+    'SOL': 'solana',
+    'XRP': 'ripple',
+    'BNB': 'binancecoin',
+    'USDT': 'tether',
+    'USDC': 'usd-coin',
+}
+
+logger = logging.getLogger('PriceOracle')
+
+
+def fetch_simple_prices(keys):
+    """Prices (and 24h volumes) of every requested asset in one CoinGecko call.
+
+    Only the requested ids are returned, instead of the full markets page.
+    """
+    symbols = {key.split('_')[0] for key in keys}
+    ids = {COINGECKO_IDS[symbol]: symbol for symbol in symbols if symbol in COINGECKO_IDS}
+    if not ids:
+        return {}
+    params = {'ids': ','.join(sorted(ids)), 'vs_currencies': 'usd'}
+    if any(key.endswith('_VOLUME') for key in keys):
+        params['include_24hr_vol'] = 'true'
+    if any(key.endswith('_CHANGE') for key in keys):
+        params['include_24hr_change'] = 'true'
+
+    response = http_client.get(COINGECKO_SIMPLE_PRICE_API, params=params, api='coingecko')
+    response.raise_for_status()
+    prices = {}
+    for coin_id, quote in response.json().items():
+        symbol = ids.get(coin_id)
+        if symbol and 'usd' in quote:
+            prices[symbol] = float(quote['usd'])
+            if 'usd_24h_vol' in quote:
+                prices[f"{symbol}_VOLUME"] = float(quote['usd_24h_vol'])
+            if quote.get('usd_24h_change') is not None:
+                prices[f"{symbol}_CHANGE"] = float(quote['usd_24h_change'])
+    return prices
+
+
+def fetch_mempool_btc_price():
+    response = http_client.get(MEMPOOL_PRICES_API, api='mempool_space')
+    response.raise_for_status()
+    return float(response.json()['USD'])
+
+
+def fetch_usd_prices(keys):
+    """Default source: batched CoinGecko simple/price, mempool.space as BTC fallback"""
+    try:
+        prices = fetch_simple_prices(keys)
+    except Exception as e:
+        if 'BTC' not in keys:
+            raise
+        logger.warning(f"CoinGecko price fetch failed: {e}")
+        prices = {}
+    if 'BTC' in keys and 'BTC' not in prices:
+        prices['BTC'] = fetch_mempool_btc_price()
+    return prices
+
+
+class PriceOracle:
+    """TTL cache with single-flight refresh in front of a price source.
+
+    ``fetch`` takes a list of keys and returns a dict of the prices it
+    could get; missing keys are treated as failures for those keys.
+    """
+
+    def __init__(self, fetch=fetch_usd_prices, ttl=60, max_stale=900, retry_after=60):
+        self.fetch = fetch
+        self.ttl = ttl                  # seconds a price counts as fresh
+        self.max_stale = max_stale      # seconds a price may be served while refreshing
+        self.retry_after = retry_after  # seconds before a failed key is fetched again
+        self.prices = {}                # key: (price, fetched at)
+        self.failed = {}                # key: time of the last failed fetch
+        self.inflight = {}              # key: Event set when its refresh finishes
+        self.lock = threading.Lock()
+
+    def get(self, key, default=None):
+        return self.get_many([key]).get(key, default)
+
+    def get_many(self, keys):
+        """Prices of ``keys``; unknown keys are missing from the result"""
+        now = time.monotonic()
+        result, stale, missing = {}, [], []
+        with self.lock:
+            for key in keys:
+                cached = self.prices.get(key)
+                if cached is not None and now - cached[1] < self.ttl:
+                    result[key] = cached[0]
+                elif now - self.failed.get(key, -self.retry_after) < self.retry_after:
+                    # Failed recently: no fetch, serve whatever we last had
+                    if cached is not None:
+                        result[key] = cached[0]
+                elif cached is not None and now - cached[1] < self.max_stale:
+                    result[key] = cached[0]
+                    if key not in self.inflight:
+                        stale.append(key)
+                else:
+                    missing.append(key)
+
+        if stale:
+            # Serve the stale price now, refresh in the background
+            threading.Thread(target=self._refresh, args=(stale,), daemon=True).start()
+        if missing:
+            self._refresh(missing, wait=True)
+            with self.lock:
+                for key in missing:
+                    if key in self.prices:
+                        result[key] = self.prices[key][0]
+        return result
+
+    def _refresh(self, keys, wait=False):
+        """Fetch ``keys`` unless another thread already is; optionally wait for it"""
+        owned, pending = [], []
+        with self.lock:
+            for key in keys:
+                event = self.inflight.get(key)
+                if event is None:
+                    self.inflight[key] = threading.Event()
+                    owned.append(key)
+                else:
+                    pending.append(event)
+
+        if owned:
+            try:
+                prices = self.fetch(owned)
+            except Exception as e:
+                logger.warning(f"Price refresh failed for {owned}: {e}")
+                prices = {}
+            fetched_at = time.monotonic()
+            with self.lock:
+                # Keep extra keys the source returned too (e.g. volume with price)
+                for key, price in prices.items():
+                    self.prices[key] = (price, fetched_at)
+                    self.failed.pop(key, None)
+                for key in owned:
+                    if key not in prices:
+                        self.failed[key] = fetched_at
+                    self.inflight.pop(key).set()
+
+        if wait:
+            for event in pending:
+                event.wait()
+
+    def set(self, key, price):
+        """Seed or override a cached price"""
+        with self.lock:
+            self.prices[key] = (price, time.monotonic())
+
+
+_default_oracle = None
+_default_lock = threading.Lock()
+
+
+def get_oracle():
+    """Return the process-wide oracle, creating it on first use"""
+    global _default_oracle
+    if _default_oracle is None:
+        with _default_lock:
+            if _default_oracle is None:
+                _default_oracle = PriceOracle()
+    return _default_oracle
+
+
+def get_price(key, default=None):
+    """Cached USD price of ``key`` from the process-wide oracle"""
+    return get_oracle().get(key, default)
+
+
+def get_prices(keys):
+    return get_oracle().get_many(keys)
@@ -0,0 +1,54 @@
+# -*- coding: UTF-8 -*-
+"""Price progress bars rendered once into a lookup table indexed by integer percent."""
+from functools import lru_cache
+
+FILLED = "⬛"
+EMPTY = "⬜"
+MARKER = "🟥"
+
+
+class ProgressBar:
+    """Every bar from 0% to ``max_percent`` precomputed, so rendering is a lookup.
+
+    A bar has ``width`` cells filled proportionally to the percent. On every
+    multiple of ``marker_every`` percent the last filled cell is drawn as
+    the marker. ``min_filled`` cells are always filled above 0%. Percents
+    past the table render as a full bar labelled with the real percent.
+    """
+
+    def __init__(self, width=10, max_percent=100, marker_every=10, min_filled=0,
+                 filled=FILLED, empty=EMPTY, marker=MARKER):
+        self.width = width
+        self.max_percent = max_percent
+        self.marker_every = marker_every
+        self.min_filled = min_filled
+        self.filled = filled
+        self.empty = empty
+        self.marker = marker
+        self.table = tuple(self._build(percent) for percent in range(max_percent + 1))
+
+    def _build(self, percent):
+        cells = min(self.width, percent * self.width // 100)
+        if percent > 0:
+            cells = max(cells, min(self.min_filled, self.width))
+        bar = [self.filled] * cells + [self.empty] * (self.width - cells)
+        if self.marker_every and cells and percent % self.marker_every == 0 and percent <= 100:
+            bar[cells - 1] = self.marker
+        return f"{''.join(bar)} {percent}%"
+
+    def render(self, percentage):
+        """Bar for ``percentage``, rounded to an integer (negative counts as 0)"""
+        percent = max(0, int(round(percentage)))
+        if percent > self.max_percent:
+            return self._build(percent)
+        return self.table[percent]
+
+
+@lru_cache(maxsize=None)
+def get_bar(width=10, max_percent=100, marker_every=10, min_filled=0):
+    """Shared ProgressBar for a configuration, built on first use"""
+    return ProgressBar(width, max_percent, marker_every, min_filled)
+
+
+def progress_bar(percentage, width=10):
+    return get_bar(width).render(percentage)
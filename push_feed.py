@@ -0,0 +1,138 @@
+# -*- coding: UTF-8 -*-
+"""Push ingestion of new blocks and unconfirmed transactions over a WebSocket.
+
+Speaks blockchain.info's ``inv`` protocol: subscribe with ``blocks_sub`` /
+``unconfirmed_sub`` and receive ``{"op": "block"}`` and ``{"op": "utx"}``
+messages. Needs the ``websocket-client`` package; without it, or while the
+socket keeps failing, the feed falls back to polling.
+"""
+import json
+import logging
+import time
+
+from rate_limiter import Backoff
+
+try:
+    import websocket  # websocket-client
+except ImportError:
+    websocket = None
+
+WS_URL = "wss://ws.blockchain.info/inv"
+
+_TIMEOUTS = (TimeoutError,)
+if websocket is not None:
+    _TIMEOUTS += (websocket.WebSocketTimeoutException,)
+
+
+def connect_websocket(url, timeout):
+    """Default connection factory; the result needs send(), recv() and close()"""
+    if websocket is None:
+        raise RuntimeError("websocket-client is not installed")
+    return websocket.create_connection(url, timeout=timeout)
+
+
+class PushFeed:
+    """Iterable of whale AlertRecords from a BitcoinWhaleTracker, pushed instead of polled.
+
+    Every (re)connect first catches up from the tracker's checkpoint to the
+    current tip, so blocks mined while disconnected are never skipped.
+    Pushed blocks go through ``on_new_tip`` (same catch-up and dedupe as
+    polling), pushed transactions through ``process_unconfirmed``.
+
+    After ``max_failures`` consecutive connection failures the feed polls
+    for ``fallback_period`` seconds, then tries the socket again.
+    """
+
+    def __init__(self, tracker, url=WS_URL, subscribe_mempool=True, connect=connect_websocket,
+                 ping_interval=30, max_failures=5, poll_interval=30, fallback_period=300,
+                 backoff=None):
+        self.tracker = tracker
+        self.url = url
+        self.subscribe_mempool = subscribe_mempool
+        self.connect = connect                  # callable(url, timeout) -> connection
+        self.ping_interval = ping_interval      # seconds of silence before a ping
+        self.max_failures = max_failures
+        self.poll_interval = poll_interval
+        self.fallback_period = fallback_period
+        self.backoff = backoff or Backoff(base=1, cap=60)
+        self.connected = False
+        self.messages = 0                       # messages received on the current connection
+        self.logger = logging.getLogger('PushFeed')
+
+    def __iter__(self):
+        failures = 0
+        while True:
+            if websocket is None and self.connect is connect_websocket:
+                self.logger.warning("websocket-client not installed, polling instead")
+                yield from self._poll(None)
+                return
+
+            self.messages = 0
+            try:
+                yield from self._session()
+            except Exception as e:
+                self.logger.warning(f"WebSocket feed error: {e}")
+            finally:
+                self.connected = False
+
+            # Any traffic means the socket worked: start counting from scratch
+            failures = 0 if self.messages else failures + 1
+            if failures >= self.max_failures:
+                self.logger.warning(f"WebSocket unavailable, polling for {self.fallback_period}s")
+                yield from self._poll(self.fallback_period)
+                failures = 0
+            else:
+                time.sleep(self.backoff.delay(failures))
+
+    def _session(self):
+        """One connection: resume from the checkpoint, subscribe, then relay messages"""
+        conn = self.connect(self.url, self.ping_interval)
+        try:
+            self.connected = True
+            conn.send(json.dumps({'op': 'blocks_sub'}))
+            if self.subscribe_mempool:
+                conn.send(json.dumps({'op': 'unconfirmed_sub'}))
+
+            # Blocks mined while we were disconnected
+            yield from self.tracker.check_new_block()
+
+            idle = False
+            while True:
+                try:
+                    raw = conn.recv()
+                except _TIMEOUTS:
+                    if idle:
+                        raise ConnectionError("no reply to ping")
+                    idle = True
+                    conn.send(json.dumps({'op': 'ping'}))
+                    continue
+                if not raw:
+                    raise ConnectionError("connection closed")
+                idle = False
+                self.messages += 1
+                yield from self._handle(json.loads(raw))
+        finally:
+            conn.close()
+
+    def _handle(self, message):
+        op = message.get('op')
+        if op == 'block':
+            block = message['x']
+            return self.tracker.on_new_tip(block['height'], block['hash'])
+        if op == 'utx':
+            return self.tracker.process_unconfirmed([message['x']])
+        return []
+
+    def _poll(self, duration):
+        """Poll the chain tip (and mempool) for ``duration`` seconds, or forever if None"""
+        deadline = None if duration is None else time.monotonic() + duration
+        while deadline is None or time.monotonic() < deadline:
+            checks = [self.tracker.check_new_block]
+            if self.subscribe_mempool:
+                checks.append(self.tracker.check_mempool)
+            for check in checks:
+                try:
+                    yield from check()
+                except Exception as e:
+                    self.logger.error(f"Polling fallback error: {e}")
+            time.sleep(self.poll_interval)
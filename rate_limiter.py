@@ -0,0 +1,103 @@
+# -*- coding: UTF-8 -*-
+"""Shared outbound rate limiting: per-API token buckets and retry backoff."""
+import asyncio
+import random
+import threading
+import time
+from email.utils import parsedate_to_datetime
+
+# api name: (requests per second, burst allowance)
+API_LIMITS = {
+    'etherscan': (5, 5),            # free tier: 5 calls/sec
+    'eth_rpc': (10, 20),            # JSON-RPC node used for eth_getLogs
+    'blockchain_info': (3, 10),
+    'mempool_space': (1, 5),
+    'coingecko': (0.5, 5),          # public API: ~30 calls/min
+    'twitter': (1 / 30, 1),         # one tweet every 30 seconds
+}
+
+_limiters = {}
+_registry_lock = threading.Lock()
+
+
+class TokenBucket:
+    """Thread-safe token bucket shared by everything calling one API.
+
+    ``rate`` tokens are added per second up to ``capacity``, which is the
+    burst allowance. ``acquire`` blocks until a token is available.
+    """
+
+    def __init__(self, rate, capacity=None):
+        self.rate = float(rate)
+        self.capacity = float(capacity if capacity is not None else rate)
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def _refill(self, now):
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def try_acquire(self, tokens=1):
+        """Take tokens without waiting; returns the seconds to wait if none are available"""
+        with self.lock:
+            self._refill(time.monotonic())
+            if self.tokens >= tokens:
+                self.tokens -= tokens
+                return 0.0
+            return (tokens - self.tokens) / self.rate
+
+    def acquire(self, tokens=1):
+        """Block until tokens are available"""
+        while True:
+            wait = self.try_acquire(tokens)
+            if not wait:
+                return
+            time.sleep(wait)
+
+    async def acquire_async(self, tokens=1):
+        """Wait for tokens without blocking the event loop"""
+        while True:
+            wait = self.try_acquire(tokens)
+            if not wait:
+                return
+            await asyncio.sleep(wait)
+
+
+def get_limiter(api):
+    """Return the process-wide bucket for an API, creating it from API_LIMITS"""
+    with _registry_lock:
+        limiter = _limiters.get(api)
+        if limiter is None:
+            rate, burst = API_LIMITS.get(api, (1, 1))
+            limiter = _limiters[api] = TokenBucket(rate, burst)
+        return limiter
+
+
+def parse_retry_after(value):
+    """Seconds to wait from a Retry-After header (delta-seconds or HTTP date)"""
+    if value is None:
+        return None
+    try:
+        return max(0.0, float(value))
+    except (TypeError, ValueError):
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+class Backoff:
+    """Exponential backoff with full jitter, deferring to server hints"""
+
+    def __init__(self, base=1.0, cap=60.0, factor=2.0):
+        self.base = base
+        self.cap = cap
+        self.factor = factor
+
+    def delay(self, attempt, retry_after=None):
+        """Seconds to wait before retry number ``attempt`` (starting at 0), never above ``cap``"""
+        if retry_after is not None:
+            return min(retry_after, self.cap)
+        return random.uniform(0, min(self.cap, self.base * self.factor ** attempt))
@@ -0,0 +1,43 @@
+# -*- coding: UTF-8 -*-
+from collections import OrderedDict
+
+
+class RecentSet:
+    """Fixed-capacity set that forgets its least recently added items.
+
+    Insert, lookup and eviction are all O(1), so memory stays constant
+    no matter how long the monitor runs.
+    """
+
+    def __init__(self, capacity=1000, items=()):
+        if capacity < 1:
+            raise ValueError("capacity must be at least 1")
+        self.capacity = capacity
+        self._items = OrderedDict()
+        for item in items:
+            self.add(item)
+
+    def add(self, item):
+        """Add an item; returns False if it was already present"""
+        if item in self._items:
+            self._items.move_to_end(item)
+            return False
+        self._items[item] = None
+        if len(self._items) > self.capacity:
+            self._items.popitem(last=False)
+        return True
+
+    def discard(self, item):
+        self._items.pop(item, None)
+
+    def clear(self):
+        self._items.clear()
+
+    def __contains__(self, item):
+        return item in self._items
+
+    def __len__(self):
+        return len(self._items)
+
+    def __iter__(self):
+        return iter(self._items)
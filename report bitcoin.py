@@ -1,9 +1,13 @@
 # -*- coding: UTF-8 -*-
-import requests
+import http_client
 import time
 import os
 from datetime import datetime
 from collections import defaultdict
+from amounts import to_base_units, to_float
+from price_oracle import get_price
+from alert_record import AlertRecord
+from recent_set import RecentSet
 
 # Add known addresses mapping at the top of the file
 KNOWN_ENTITIES = {
@@ -21,19 +25,14 @@ KNOWN_ENTITIES = {
 
 # Add BTC price function
 def get_btc_price():
-    try:
-        import requests
-        response = requests.get('https://api.coingecko.com/api/v3/simple/price?ids=bitcoin&vs_currencies=usd')
-        return float(response.json()['bitcoin']['usd'])
-    except:
-        return 30000  # Fallback price if API fails
+    return get_price('BTC', 30000)  # Fallback price if the oracle has none
 
 class BitcoinWhaleTracker:
     def __init__(self, min_btc=100):
         self.base_url = "https://blockchain.info"
         self.min_btc = min_btc
         self.satoshi_to_btc = 100000000
-        self.processed_blocks = set()  # Track processed blocks
+        self.processed_blocks = RecentSet(1000)  # Track the last 1000 processed blocks
         self.last_block_height = None  # Track last block height
         
         # Create svg output directory if it doesn't exist
@@ -257,7 +256,7 @@ class BitcoinWhaleTracker:
     def get_latest_block(self):
         """Get the latest block hash and ensure we don't process duplicates"""
         try:
-            response = requests.get(f"{self.base_url}/latestblock")
+            response = http_client.get(f"{self.base_url}/latestblock", api='blockchain_info')
             block_data = response.json()
             current_height = block_data['height']
             current_hash = block_data['hash']
@@ -274,9 +273,6 @@ class BitcoinWhaleTracker:
             # If this is a new block
             if current_height > self.last_block_height:
                 self.last_block_height = current_height
-                # Keep track of last 1000 blocks to manage memory
-                if len(self.processed_blocks) > 1000:
-                    self.processed_blocks.clear()
                 self.processed_blocks.add(current_hash)
                 print(f"\nNew Block: {current_height} | Hash: {current_hash[:8]}...")
                 return current_hash
@@ -290,7 +286,7 @@ class BitcoinWhaleTracker:
     def get_block_transactions(self, block_hash):
         """Get all transactions in a block"""
         try:
-            response = requests.get(f"{self.base_url}/rawblock/{block_hash}")
+            response = http_client.get(f"{self.base_url}/rawblock/{block_hash}", api='blockchain_info')
             return response.json()['tx']
         except Exception as e:
             print(f"Error getting block transactions: {e}")
@@ -379,15 +375,22 @@ class BitcoinWhaleTracker:
         }
         return sentiments.get(tx_type, "")
 
-    def process_transaction(self, tx):
-        """Process a single transaction and return if it meets criteria"""
+    def process_transaction(self, tx, min_satoshis=None):
+        """Process a single transaction and return if it meets criteria.
+
+        Pass ``min_satoshis`` (the threshold converted once per block) when
+        processing many transactions.
+        """
+        if min_satoshis is None:
+            min_satoshis = to_base_units(self.min_btc, 'BTC')
+        
         # Calculate total input value
         input_value = sum(inp.get('prev_out', {}).get('value', 0) for inp in tx.get('inputs', []))
-        btc_value = input_value / self.satoshi_to_btc
         
-        # Only process transactions over minimum BTC threshold
-        if btc_value < self.min_btc:
+        # Only process transactions over minimum BTC threshold, compared in satoshis
+        if input_value < min_satoshis:
             return None
+        btc_value = to_float(input_value, 'BTC')
             
         # Get the primary sender (first input address)
         sender = tx.get('inputs', [{}])[0].get('prev_out', {}).get('addr', 'Unknown')
@@ -404,21 +407,15 @@ class BitcoinWhaleTracker:
         # Get transaction type and entities involved
         tx_info = self.determine_transaction_type(sender, receiver)
         
-        # Calculate fee
         output_value = sum(out.get('value', 0) for out in tx.get('out', []))
-        fee = (input_value - output_value) / self.satoshi_to_btc
         
-        processed_tx = {
-            'timestamp': timestamp.strftime('%Y-%m-%d %H:%M:%S'),
-            'transaction_hash': tx.get('hash', 'Unknown'),
-            'sender': sender,
-            'receiver': receiver,
-            'btc_volume': round(btc_value, 4),
-            'fee_btc': round(fee, 8),
-            'tx_type': tx_info['type'],
-            'from_entity': tx_info['from_entity'],
-            'to_entity': tx_info['to_entity']
-        }
+        processed_tx = AlertRecord(
+            'BTC', tx.get('hash', 'Unknown'), tx.get('time', 0), sender, receiver, input_value,
+            fee=input_value - output_value,
+            tx_type=tx_info['type'],
+            from_entity=tx_info['from_entity'],
+            to_entity=tx_info['to_entity']
+        )
 
         # Save SVG visualization
         svg_file = self.save_transaction_svg(processed_tx)
@@ -436,8 +433,9 @@ class BitcoinWhaleTracker:
         }.get(tx['tx_type'], '\033[94m')
         
         # Format the USD values
-        btc_usd = float(tx['btc_volume']) * get_btc_price()
-        fee_usd = float(tx['fee_btc']) * get_btc_price()
+        btc_price = get_btc_price()
+        btc_usd = float(tx['btc_volume']) * btc_price
+        fee_usd = float(tx['fee_btc']) * btc_price
         
         # Build the structured output without borders
         output = f"""
@@ -465,9 +463,8 @@ Analysis: {self.get_market_sentiment(tx['tx_type'], tx['btc_volume'])}
     def estimate_price_impact(self, btc_amount):
         """Estimate market impact of large transactions"""
         try:
-            # Get 24h BTC volume from CoinGecko
-            response = requests.get('https://api.coingecko.com/api/v3/simple/price?ids=bitcoin&vs_currencies=usd&include_24hr_vol=true')
-            volume_24h = float(response.json()['bitcoin']['usd_24h_vol'])
+            # 24h BTC volume in USD, cached by the price oracle
+            volume_24h = get_price('BTC_VOLUME')
             
             # Calculate impact as percentage of 24h volume
             impact = (btc_amount * get_btc_price() / volume_24h) * 100
@@ -486,12 +483,13 @@ Analysis: {self.get_market_sentiment(tx['tx_type'], tx['btc_volume'])}
                 
                 if block_hash:
                     transactions = self.get_block_transactions(block_hash)
+                    min_satoshis = to_base_units(self.min_btc, 'BTC')
                     processed_count = 0
                     whale_count = 0
                     
                     for tx in transactions:
                         processed_count += 1
-                        whale_tx = self.process_transaction(tx)
+                        whale_tx = self.process_transaction(tx, min_satoshis)
                         if whale_tx:
                             whale_count += 1
                             self.print_transaction(whale_tx)
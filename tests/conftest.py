@@ -0,0 +1,12 @@
+import os
+import sys
+
+# The modules live at the repository root
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import keys  # noqa: E402
+
+# keys.py only holds the credentials of a given deployment; tests never use them
+for _name in ('YOUR_ETHERSCAN_API_KEY',):
+    if not hasattr(keys, _name):
+        setattr(keys, _name, '')
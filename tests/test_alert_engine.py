@@ -0,0 +1,59 @@
+import asyncio
+
+from alert_engine import AlertEngine
+
+
+class FlakyFeed:
+    """Iterable that fails part-way on its first pass and runs dry on its second"""
+
+    def __init__(self):
+        self.passes = 0
+
+    def __iter__(self):
+        self.passes += 1
+        if self.passes == 1:
+            yield 'a'
+            raise ConnectionError('socket closed')
+        if self.passes == 2:
+            return
+        yield 'b'
+        yield 'c'
+
+
+def run_stream(engine, feed, expected):
+    async def main():
+        engine.queue = asyncio.Queue()
+        task = asyncio.ensure_future(engine._stream('test feed', feed, str.upper, retry_interval=0))
+        messages = [await asyncio.wait_for(engine.queue.get(), 5) for _ in range(expected)]
+        task.cancel()
+        return messages
+
+    return asyncio.run(main())
+
+
+def test_stream_restarts_feed_after_error_and_exhaustion(caplog):
+    feed = FlakyFeed()
+    engine = AlertEngine(post=None)
+
+    assert run_stream(engine, feed, 3) == ['A', 'B', 'C']
+    assert feed.passes == 3
+    assert 'socket closed' in caplog.text
+    assert 'ended unexpectedly' in caplog.text
+
+
+def test_stream_keeps_going_when_an_alert_fails():
+    def format_alert(item):
+        if item == 'bad':
+            raise ValueError(item)
+        return item.upper()
+
+    engine = AlertEngine(post=None)
+
+    async def main():
+        engine.queue = asyncio.Queue()
+        task = asyncio.ensure_future(engine._stream('test feed', ['bad', 'ok'], format_alert, retry_interval=0))
+        message = await asyncio.wait_for(engine.queue.get(), 5)
+        task.cancel()
+        return message
+
+    assert asyncio.run(main()) == 'OK'
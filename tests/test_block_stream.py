@@ -0,0 +1,63 @@
+import json
+import random
+
+from block_stream import iter_block_json, watch_pattern
+
+
+def make_tx(tx_hash, value, addr='1Sender', note=''):
+    return {
+        'hash': tx_hash,
+        'note': note,
+        'inputs': [{'prev_out': {'addr': addr, 'value': value}}],
+        'out': [{'addr': '1Receiver', 'value': value - 1000}],
+    }
+
+
+TRANSACTIONS = [
+    make_tx('a', 5 * 10**8),
+    make_tx('b', 700 * 10**8, note='brackets ]}{[ and "quotes" inside'),
+    make_tx('c', 2 * 10**8, note='escaped \\" quote and \\\\ backslash'),
+    make_tx('d', 900 * 10**8, note='unicode ₿ 🐋'),
+]
+DOCUMENT = json.dumps({'hash': '00ab', 'height': 1, 'tx': TRANSACTIONS, 'n_tx': 4}, ensure_ascii=False)
+
+
+def chunked(text, sizes):
+    position = 0
+    for size in sizes:
+        if position >= len(text):
+            break
+        yield text[position:position + size]
+        position += size
+    if position < len(text):
+        yield text[position:]
+
+
+def test_every_fixed_chunk_size():
+    for size in range(1, 40):
+        assert list(iter_block_json(chunked(DOCUMENT, [size] * len(DOCUMENT)))) == TRANSACTIONS
+
+
+def test_random_chunk_boundaries():
+    rng = random.Random(7)
+    for _ in range(200):
+        sizes = [rng.randint(1, 64) for _ in range(len(DOCUMENT))]
+        assert list(iter_block_json(chunked(DOCUMENT, sizes))) == TRANSACTIONS
+
+
+def test_skips_transactions_below_min_value():
+    hashes = [tx['hash'] for tx in iter_block_json(chunked(DOCUMENT, [5] * 1000), 500 * 10**8)]
+    assert hashes == ['b', 'd']
+
+
+def test_watch_keeps_smaller_transactions_of_watched_addresses():
+    transactions = TRANSACTIONS + [make_tx('e', 20 * 10**8, addr='1Watched'),
+                                   make_tx('f', 3 * 10**8, addr='1Watched')]
+    document = json.dumps({'tx': transactions})
+    watch = (watch_pattern(['1Watched']), 10 * 10**8)
+    hashes = [tx['hash'] for tx in iter_block_json(chunked(document, [11] * 1000), 500 * 10**8, watch)]
+    assert hashes == ['b', 'd', 'e']
+
+
+def test_empty_tx_array():
+    assert list(iter_block_json(['{"hash": "x", "tx": []}'])) == []
@@ -0,0 +1,32 @@
+from btc_monitor import BitcoinWhaleTracker
+
+
+def make_block(height):
+    value = 600 * 10**8
+    return [{
+        'hash': f"{height}-whale",
+        'time': 1700000000,
+        'inputs': [{'prev_out': {'addr': f"1From{height}", 'value': value}}],
+        'out': [{'addr': f"1To{height}", 'value': value - 10000}],
+    }]
+
+
+def test_long_backlog_is_caught_up_over_several_polls():
+    tracker = BitcoinWhaleTracker(min_btc=500)
+    tracker.last_block_height = 1000
+    tracker.max_catch_up_blocks = 10
+    tracker.get_chain_tip = lambda: (1025, 'hash1025')
+    fetched = []
+
+    def fetch_block(height, block_hash=None):
+        fetched.append(height)
+        return height, block_hash or f"hash{height}", make_block(height)
+
+    tracker.fetch_block = fetch_block
+
+    polls = [[record.tx_hash for record in tracker.check_new_block()] for _ in range(4)]
+
+    assert [len(whales) for whales in polls] == [10, 10, 5, 0]
+    assert fetched == list(range(1001, 1026))
+    assert polls[0][0] == '1001-whale' and polls[2][-1] == '1025-whale'
+    assert tracker.last_block_height == 1025
@@ -0,0 +1,166 @@
+import http_client
+from erc20_logs import TRANSFER_TOPIC, decode_transfer_logs
+from usdt_monitor import USDTWhaleTracker
+
+USDT = '0xdac17f958d2ee523a2206206994597c13d831ec7'
+USDC = '0xa0b86991c6218b36c1d19d4a2e9eb0ce3606eb48'
+
+
+def topic(address):
+    return '0x' + '0' * 24 + address[2:]
+
+
+def transfer_log(contract, block, log_index, sender, receiver, value, tx_hash=None, **extra):
+    log = {
+        'address': contract,
+        'topics': [TRANSFER_TOPIC, topic(sender), topic(receiver)],
+        'data': hex(value) if value else '0x',
+        'blockNumber': hex(block),
+        'transactionHash': tx_hash or f"0x{block:04x}{log_index:04x}",
+        'logIndex': hex(log_index),
+    }
+    log.update(extra)
+    return log
+
+
+class FakeResponse:
+    def __init__(self, data):
+        self.data = data
+
+    def raise_for_status(self):
+        pass
+
+    def json(self):
+        return self.data
+
+
+class FakeNode:
+    """Stand-in JSON-RPC endpoint serving eth_blockNumber and eth_getLogs from a list of logs"""
+
+    def __init__(self, logs, tip, max_results=None):
+        self.logs = logs
+        self.tip = tip
+        self.max_results = max_results  # like a hosted node's eth_getLogs cap
+        self.requests = []
+
+    def post(self, url, json=None, **kwargs):
+        method, params = json['method'], json['params']
+        self.requests.append((method, params))
+        if method == 'eth_blockNumber':
+            result = hex(self.tip)
+        elif method == 'eth_getLogs':
+            query = params[0]
+            start, end = int(query['fromBlock'], 16), int(query['toBlock'], 16)
+            addresses = {address.lower() for address in query['address']}
+            result = [log for log in self.logs
+                      if start <= int(log['blockNumber'], 16) <= end and log['address'].lower() in addresses]
+            if self.max_results is not None and len(result) > self.max_results:
+                return FakeResponse({'jsonrpc': '2.0', 'id': json['id'], 'error': {
+                    'code': -32005, 'message': f"query returned more than {self.max_results} results"}})
+        else:
+            return FakeResponse({'jsonrpc': '2.0', 'id': json['id'], 'error': {'message': 'unknown method'}})
+        return FakeResponse({'jsonrpc': '2.0', 'id': json['id'], 'result': result})
+
+
+def test_decode_transfer_logs():
+    sender, receiver = '0x' + 'ab' * 20, '0x' + 'cd' * 20
+    logs = [
+        transfer_log(USDT.upper().replace('0X', '0x'), 100, 3, sender, receiver, 5_000_000_000,
+                     blockTimestamp=hex(1700000000)),
+        transfer_log(USDC, 101, 0, sender, receiver, 0),
+        # ERC-721 Transfer: token id indexed as a fourth topic
+        dict(transfer_log(USDT, 102, 1, sender, receiver, 0), topics=[TRANSFER_TOPIC, topic(sender), topic(receiver), '0x1']),
+        # Dropped by a reorg
+        transfer_log(USDT, 103, 2, sender, receiver, 1, removed=True),
+    ]
+    columns = decode_transfer_logs(logs)
+    assert columns['contract'] == [USDT, USDC]
+    assert columns['block'] == [100, 101]
+    assert columns['log_index'] == [3, 0]
+    assert columns['from'] == [sender, sender]
+    assert columns['to'] == [receiver, receiver]
+    assert columns['value'] == [5_000_000_000, 0]
+    assert columns['timestamp'] == [1700000000, None]
+
+
+def test_get_transfers_from_rpc(monkeypatch):
+    sender, receiver = '0x' + '11' * 20, '0x' + '22' * 20
+    logs = [
+        transfer_log(USDT, 1001, 0, sender, receiver, 5_000 * 10**6),      # 5,000 USDT
+        transfer_log(USDT, 1002, 1, sender, receiver, 500 * 10**6),        # below threshold
+        transfer_log(USDC, 1004, 2, sender, receiver, 2_500 * 10**6),      # 2,500 USDC
+        transfer_log(USDT, 1006, 0, sender, receiver, 9_000 * 10**6),      # past the tip asked for
+    ]
+    node = FakeNode(logs, tip=1005)
+    monkeypatch.setattr(http_client, 'post', node.post)
+
+    tracker = USDTWhaleTracker(min_usdt=1000, rpc_url='http://node.invalid')
+    tracker.log_range_size = 2
+    tracker.last_block = 1000
+    assert tracker.get_latest_block() == 1005
+
+    transfers = tracker.get_transfers(1005)
+    assert [(t.token, t.block, t.value) for t in transfers] == [
+        ('USDT', 1001, 5_000 * 10**6),
+        ('USDC', 1004, 2_500 * 10**6),
+    ]
+    assert transfers[0].sender == sender and transfers[0].receiver == receiver
+    assert tracker.last_fetch_complete and tracker.fetched_through == 1005
+
+    # Contiguous ranges of at most log_range_size blocks
+    ranges = [(int(p[0]['fromBlock'], 16), int(p[0]['toBlock'], 16))
+              for method, p in node.requests if method == 'eth_getLogs']
+    assert ranges == [(1001, 1002), (1003, 1004), (1005, 1005)]
+
+    # Served again: already seen
+    assert tracker.get_transfers(1005) == []
+
+
+def test_wide_ranges_are_split_until_the_node_accepts_them(monkeypatch):
+    sender, receiver = '0x' + '33' * 20, '0x' + '44' * 20
+    # Four large transfers in every block: far more than the node serves per query
+    logs = [transfer_log(contract, block, index, sender, receiver, 5_000 * 10**6)
+            for block in range(20001, 21201)
+            for index, contract in enumerate([USDT, USDC, USDT, USDC])]
+    node = FakeNode(logs, tip=21200, max_results=150)
+    monkeypatch.setattr(http_client, 'post', node.post)
+
+    tracker = USDTWhaleTracker(min_usdt=1000, rpc_url='http://node.invalid')
+    tracker.last_block = 20000
+
+    transfers = []
+    for _ in range(5):
+        transfers.extend(tracker.check_new_transfers())
+        if tracker.last_block == 21200:
+            break
+    assert tracker.last_block == 21200
+    assert len(transfers) == len(logs)
+    assert len({(t.tx_hash, t.log_index) for t in transfers}) == len(logs)
+
+
+def test_rpc_error_keeps_completed_ranges(monkeypatch):
+    sender, receiver = '0x' + '55' * 20, '0x' + '66' * 20
+    logs = [transfer_log(USDT, block, 0, sender, receiver, 5_000 * 10**6) for block in range(1001, 1011)]
+    node = FakeNode(logs, tip=1010)
+
+    def flaky_post(url, json=None, **kwargs):
+        query = json['params'][0]
+        if json['method'] == 'eth_getLogs' and int(query['fromBlock'], 16) >= 1005:
+            return FakeResponse({'jsonrpc': '2.0', 'id': json['id'], 'error': {'code': -32000, 'message': 'internal error'}})
+        return node.post(url, json=json, **kwargs)
+
+    monkeypatch.setattr(http_client, 'post', flaky_post)
+    tracker = USDTWhaleTracker(min_usdt=1000, rpc_url='http://node.invalid')
+    tracker.log_range_size = 2
+    tracker.last_block = 1000
+    tracker.get_latest_block = lambda: 1010
+
+    transfers = tracker.check_new_transfers()
+    assert [t.block for t in transfers] == [1001, 1002, 1003, 1004]
+    assert not tracker.last_fetch_complete
+    assert tracker.last_block == 1004
+
+    # The node recovers: the next poll resumes after block 1004
+    monkeypatch.setattr(http_client, 'post', node.post)
+    assert [t.block for t in tracker.check_new_transfers()] == list(range(1005, 1011))
+    assert tracker.last_block == 1010
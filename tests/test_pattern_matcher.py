@@ -0,0 +1,43 @@
+import random
+
+from pattern_matcher import PatternMatcher
+
+
+def naive_match(patterns, text):
+    text = text.lower()
+    return [label for label, words in patterns.items()
+            if any(word and word.lower() in text for word in words)]
+
+
+def test_overlapping_patterns():
+    matcher = PatternMatcher({'a': ['he'], 'b': ['she'], 'c': ['hers'], 'd': ['his']})
+    assert matcher.match('ushers') == ['a', 'b', 'c']
+    assert matcher.match('nothing here') == ['a']
+    assert matcher.match('this') == ['d']
+    assert matcher.match('') == []
+
+
+def test_case_insensitive_and_label_order():
+    matcher = PatternMatcher({'silk_road': ['1F1tAaz5x1HUXrCNLbtMDqcw6o5GNn4xqX'],
+                              'exchanges': ['binance', 'Coinbase']})
+    assert matcher.match('from #coinbase to 1f1taaz5x1huxrcnlbtmdqcw6o5gnn4xqx') == ['silk_road', 'exchanges']
+    assert matcher.match('BINANCE') == ['exchanges']
+
+
+def test_empty_patterns_are_ignored():
+    assert PatternMatcher({'a': ['', 'x'], 'b': []}).match('xyz') == ['a']
+
+
+def test_agrees_with_substring_search():
+    rng = random.Random(3)
+    alphabet = 'abc._'
+    for _ in range(200):
+        patterns = {
+            f"label{i}": [''.join(rng.choice(alphabet) for _ in range(rng.randint(1, 4)))
+                          for _ in range(rng.randint(1, 3))]
+            for i in range(rng.randint(1, 6))
+        }
+        matcher = PatternMatcher(patterns)
+        for _ in range(10):
+            text = ''.join(rng.choice(alphabet + 'ABC') for _ in range(rng.randint(0, 30)))
+            assert matcher.match(text) == naive_match(patterns, text)
@@ -0,0 +1,148 @@
+import json
+
+import pytest
+
+from btc_monitor import BitcoinWhaleTracker
+from checkpoint_store import CheckpointStore
+from push_feed import PushFeed
+from rate_limiter import Backoff
+
+WHALE = 600 * 10**8
+
+
+class TooManyConnections(BaseException):
+    """Ends a test whose feed would otherwise retry forever"""
+
+
+def make_tx(tx_hash, value):
+    return {
+        'hash': tx_hash,
+        'time': 1700000000,
+        'inputs': [{'prev_out': {'addr': f"1From{tx_hash}", 'value': value}}],
+        'out': [{'addr': f"1To{tx_hash}", 'value': value - 10000}],
+    }
+
+
+class FakeChain:
+    """Blocks 100-102, each with one whale and one small transaction"""
+
+    def __init__(self, tip):
+        self.tip = tip
+        self.blocks = {height: [make_tx(f"{height}-whale", WHALE), make_tx(f"{height}-small", 10**8)]
+                       for height in (100, 101, 102)}
+
+    def attach(self, tracker):
+        tracker.get_chain_tip = lambda: (self.tip, f"hash{self.tip}")
+        tracker.fetch_block = lambda height, block_hash=None: (height, f"hash{height}", self.blocks[height])
+        tracker.check_mempool = lambda: []
+
+
+class FakeConnection:
+    """Replays a script of raw messages (or exceptions to raise), then reports a closed socket"""
+
+    def __init__(self, script):
+        self.script = list(script)
+        self.sent = []
+        self.closed = False
+
+    def send(self, message):
+        self.sent.append(json.loads(message)['op'])
+
+    def recv(self):
+        item = self.script.pop(0) if self.script else ''
+        if isinstance(item, Exception):
+            raise item
+        return item
+
+    def close(self):
+        self.closed = True
+
+
+@pytest.fixture
+def tracker(tmp_path):
+    store = CheckpointStore(str(tmp_path / 'checkpoints.db'))
+    store.set_cursor('btc', 99, 'hash99')
+    tracker = BitcoinWhaleTracker(min_btc=500, checkpoint_store=store)
+    yield tracker
+    store.close()
+
+
+def make_feed(tracker, connect, **kwargs):
+    return PushFeed(tracker, connect=connect, poll_interval=0.01, fallback_period=0.5,
+                    backoff=Backoff(base=0.01, cap=0.01), **kwargs)
+
+
+def collect_until(feed, last_hash):
+    records = []
+    for record in feed:
+        records.append((record.tx_hash, record.unconfirmed))
+        if record.tx_hash == last_hash:
+            return records
+
+
+def test_catch_up_push_and_reconnect(tracker):
+    chain = FakeChain(tip=100)
+    chain.attach(tracker)
+    connections = []
+
+    def connect(url, timeout):
+        if len(connections) == 0:
+            connection = FakeConnection([
+                json.dumps({'op': 'utx', 'x': chain.blocks[101][0]}),
+                json.dumps({'op': 'utx', 'x': chain.blocks[101][1]}),
+                TimeoutError(),
+                json.dumps({'op': 'pong'}),
+                json.dumps({'op': 'block', 'x': {'height': 101, 'hash': 'hash101'}}),
+            ])
+        elif len(connections) == 1:
+            chain.tip = 102  # mined while the socket was down
+            connection = FakeConnection([])
+        else:
+            raise TooManyConnections()
+        connections.append(connection)
+        return connection
+
+    records = collect_until(make_feed(tracker, connect), '102-whale')
+
+    # Block 100 from the checkpoint catch-up, the 101 whale once (from the
+    # mempool, not again when mined), then block 102 after reconnecting
+    assert records == [('100-whale', False), ('101-whale', True), ('102-whale', False)]
+    assert connections[0].sent == ['blocks_sub', 'unconfirmed_sub', 'ping']
+    assert connections[0].closed
+    assert tracker.checkpoint_store.get_cursor('btc') == (102, 'hash102')
+
+
+def test_falls_back_to_polling(tracker):
+    chain = FakeChain(tip=101)
+    chain.attach(tracker)
+    attempts = []
+
+    def connect(url, timeout):
+        attempts.append(url)
+        if len(attempts) > 2:
+            raise TooManyConnections()
+        raise OSError('connection refused')
+
+    feed = make_feed(tracker, connect, max_failures=2)
+    records = collect_until(feed, '101-whale')
+
+    assert records == [('100-whale', False), ('101-whale', False)]
+    assert len(attempts) == 2
+    assert not feed.connected
+
+
+def test_resumes_from_checkpoint_after_restart(tracker, tmp_path):
+    chain = FakeChain(tip=100)
+    chain.attach(tracker)
+
+    def connect(url, timeout):
+        return FakeConnection([])
+
+    assert collect_until(make_feed(tracker, connect), '100-whale') == [('100-whale', False)]
+
+    # New process, same database: block 100 is not alerted again
+    restarted = BitcoinWhaleTracker(min_btc=500, checkpoint_store=tracker.checkpoint_store)
+    chain.tip = 101
+    chain.attach(restarted)
+    assert restarted.last_block_height == 100
+    assert collect_until(make_feed(restarted, connect), '101-whale') == [('101-whale', False)]
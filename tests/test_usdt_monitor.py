@@ -0,0 +1,111 @@
+import http_client
+from usdt_monitor import USDTWhaleTracker
+
+USDT = '0xdac17f958d2ee523a2206206994597c13d831ec7'
+USDC = '0xa0b86991c6218b36c1d19d4a2e9eb0ce3606eb48'
+
+
+class FakeResponse:
+    def __init__(self, data):
+        self.data = data
+        self.status_code = 200
+
+    def raise_for_status(self):
+        pass
+
+    def json(self):
+        return self.data
+
+
+class FakeEtherscan:
+    """Stand-in for Etherscan's tokentx endpoint, with its 10,000 result window"""
+
+    def __init__(self, transfers):
+        self.transfers = transfers      # contract: [(block, index)], ascending
+        self.fail = {}                  # contract: page number answered with an error
+        self.requests = []
+
+    def get(self, url, params=None, **kwargs):
+        contract = params['contractaddress']
+        start, end = int(params['startblock']), int(params['endblock'])
+        page, offset = int(params['page']), int(params['offset'])
+        self.requests.append((contract, start, end, page))
+        if self.fail.get(contract) == page:
+            return FakeResponse({'status': '0', 'message': 'NOTOK', 'result': 'Max calls per sec exceeded'})
+        if page * offset > 10000:
+            return FakeResponse({'status': '0', 'message': 'NOTOK',
+                                 'result': 'Result window is too large, PageNo x Offset size must be less than or equal to 10000'})
+        rows = [(block, index) for block, index in self.transfers.get(contract, []) if start <= block <= end]
+        rows = rows[(page - 1) * offset:page * offset]
+        if not rows:
+            return FakeResponse({'status': '0', 'message': 'No transactions found', 'result': []})
+        return FakeResponse({'status': '1', 'message': 'OK', 'result': [{
+            'hash': f"0x{contract[2:6]}{block:06d}{index:05d}",
+            'logIndex': str(index),
+            'blockNumber': str(block),
+            'timeStamp': '1700000000',
+            'from': '0x' + '11' * 20,
+            'to': '0x' + '22' * 20,
+            'value': str(5_000 * 10**6),
+        } for block, index in rows]})
+
+
+def make_tracker(monkeypatch, api, last_block, tip):
+    monkeypatch.setattr(http_client, 'get', api.get)
+    tracker = USDTWhaleTracker(min_usdt=1000)
+    tracker.last_block = last_block
+    tracker.get_latest_block = lambda: tip
+    return tracker
+
+
+def poll_until(tracker, tip, max_polls=10):
+    transfers = []
+    for _ in range(max_polls):
+        transfers.extend(tracker.check_new_transfers())
+        if tracker.last_block == tip:
+            break
+    return transfers
+
+
+def test_result_cap_resumes_without_gaps_or_duplicates(monkeypatch):
+    # 12,501 USDT transfers, 7 per block: more than one query can page through
+    usdt = [(1001 + i // 7, i % 7) for i in range(12501)]
+    usdc = [(1500, 0), (2700, 0)]
+    api = FakeEtherscan({USDT: usdt, USDC: usdc})
+    tip = usdt[-1][0]
+    tracker = make_tracker(monkeypatch, api, 1000, tip)
+    tracker.max_catch_up_blocks = 5000
+
+    first = tracker.check_new_transfers()
+    # Page 10 ended inside block 2429: the cursor stops before it
+    assert tracker.last_block == 2428
+    assert not tracker.last_fetch_complete
+    assert max(t.block for t in first if t.token == 'USDT') == 2428
+    assert all(page <= 10 for _, _, _, page in api.requests)
+
+    transfers = first + poll_until(tracker, tip)
+    assert tracker.last_block == tip
+    assert len(transfers) == len(usdt) + len(usdc)
+    assert len({(t.tx_hash, t.log_index) for t in transfers}) == len(transfers)
+
+
+def test_contract_failing_part_way_holds_the_cursor(monkeypatch):
+    usdt = [(1001 + i // 3, i % 3) for i in range(3000)]
+    usdc = [(1001 + i, 0) for i in range(1500)]
+    api = FakeEtherscan({USDT: usdt, USDC: usdc})
+    api.fail[USDC] = 2
+    tracker = make_tracker(monkeypatch, api, 1000, 2000)
+
+    # USDC's transfers are dropped with its failed fetch; USDT's are kept
+    first = tracker.check_new_transfers()
+    assert not tracker.last_fetch_complete
+    assert tracker.last_block == 1000
+    assert {t.token for t in first} == {'USDT'}
+
+    # The API recovers: the range is fetched again, already alerted transfers are not repeated
+    del api.fail[USDC]
+    transfers = first + poll_until(tracker, 2000)
+    assert tracker.last_block == 2000
+    expected = [row for row in usdt + usdc if row[0] <= 2000]
+    assert len(transfers) == len(expected)
+    assert len({(t.tx_hash, t.log_index) for t in transfers}) == len(transfers)
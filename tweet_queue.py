@@ -0,0 +1,94 @@
+# -*- coding: UTF-8 -*-
+import heapq
+import itertools
+import logging
+import threading
+import time
+
+
+class PriorityTweetQueue:
+    """Tweets waiting to be posted, most important first.
+
+    ``put`` never blocks: it pushes onto a heap ordered by (priority, larger
+    size first, arrival) and returns. A single background worker pops the
+    best entry and hands it to ``post``, which is expected to respect the
+    Twitter rate limit (AlertSharkBot.post_tweet_with_retry takes a token
+    from the shared 'twitter' bucket). When the queue is full the least
+    important entry is dropped; entries older than ``max_age`` seconds are
+    skipped instead of posted late.
+    """
+
+    def __init__(self, post, maxsize=500, max_age=3600):
+        self.post = post                # callable(message) -> bool, blocking
+        self.maxsize = maxsize
+        self.max_age = max_age
+        self.heap = []                  # (priority, -size, seq, queued at, message)
+        self.counter = itertools.count()
+        self.cond = threading.Condition()
+        self.worker = None
+        self.running = False
+        self.logger = logging.getLogger('TweetQueue')
+
+    def put(self, message, priority=0, size=0):
+        """Queue ``message``; lower priority values are posted first"""
+        entry = (priority, -size, next(self.counter), time.monotonic(), message)
+        with self.cond:
+            if len(self.heap) >= self.maxsize:
+                worst = max(range(len(self.heap)), key=self.heap.__getitem__)
+                if entry > self.heap[worst]:
+                    self.logger.warning("Tweet queue full, dropping new alert")
+                    return False
+                self.heap[worst] = self.heap[-1]
+                self.heap.pop()
+                heapq.heapify(self.heap)
+                self.logger.warning("Tweet queue full, dropped least important alert")
+            heapq.heappush(self.heap, entry)
+            self.cond.notify()
+        return True
+
+    def get(self, timeout=None):
+        """Pop the most important message that is not too old, or None on timeout"""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self.cond:
+            while True:
+                while self.heap:
+                    _, _, _, queued_at, message = heapq.heappop(self.heap)
+                    if self.max_age is None or time.monotonic() - queued_at <= self.max_age:
+                        return message
+                    self.logger.info("Skipping stale alert")
+                if not self.running and self.worker is not None:
+                    return None
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    return None
+                self.cond.wait(remaining)
+
+    def __len__(self):
+        with self.cond:
+            return len(self.heap)
+
+    def _run(self):
+        while self.running:
+            message = self.get()
+            if message is None:
+                continue
+            try:
+                self.post(message)
+            except Exception as e:
+                self.logger.error(f"Error posting alert: {e}")
+
+    def start(self):
+        """Start the background poster thread (idempotent)"""
+        with self.cond:
+            if self.running:
+                return
+            self.running = True
+            self.worker = threading.Thread(target=self._run, name='tweet-poster', daemon=True)
+        self.worker.start()
+
+    def stop(self, timeout=None):
+        with self.cond:
+            self.running = False
+            self.cond.notify_all()
+        if self.worker:
+            self.worker.join(timeout)
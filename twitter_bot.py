@@ -1,10 +1,19 @@
+import os
+import sys
 import time
 import tweepy
 import logging
 import random
 from btc_monitor import BitcoinWhaleTracker
-from alert_pricebar import test_display as btc_price_bar
-from eth_pricebar import test_display as eth_price_bar
+from alert_engine import AlertEngine
+from checkpoint_store import CheckpointStore
+from rate_limiter import Backoff, get_limiter, parse_retry_after
+from price_bars import build_price_bars
+from price_oracle import get_price
+from alert_record import AlertRecord
+from tweet_queue import PriorityTweetQueue
+from pattern_matcher import PatternMatcher
+from push_feed import PushFeed
 from keys import bearer_token, consumer_key, consumer_secret, access_token, access_token_secret
 
 class AlertSharkBot:
@@ -20,7 +29,8 @@ class AlertSharkBot:
         )
         
         # Initialize BTC monitor with full address tracking
-        self.btc_monitor = BitcoinWhaleTracker(min_btc=500)
+        self.checkpoint_store = CheckpointStore('alert_shark.db')
+        self.btc_monitor = BitcoinWhaleTracker(min_btc=500, checkpoint_store=self.checkpoint_store)
         
         # Expand known exchanges and entities to track
         self.tracked_entities = {
@@ -60,6 +70,26 @@ class AlertSharkBot:
             'silk_road': 10      # Silk Road wallet movements
         }
 
+        # Single-pass matcher over every tracked name and wallet; the tracker
+        # keeps its 500 BTC floor and only watches these wallets lower
+        self.build_alert_matcher()
+
+        # Tweet order: lower first, then larger USD size first
+        self.category_priority = {
+            'silk_road': 0,
+            'high_risk': 1,
+            'seized_assets': 2,
+            'institutions': 3,
+            'defi': 4,
+            'mining_pools': 5,
+            'exchanges': 6
+        }
+        self.price_bar_priority = 9
+        self.tweet_queue = PriorityTweetQueue(self.post_tweet_with_retry)
+
+        # Assets posted as price bars, all priced by one batched fetch per cycle
+        self.price_bar_assets = ['BTC', 'ETH']
+
         # Setup logging
         logging.basicConfig(
             level=logging.INFO,
@@ -71,91 +101,198 @@ class AlertSharkBot:
         )
         self.logger = logging.getLogger('AlertSharkBot')
         
-        # Define variable delays for rate limiting
-        self.tweet_delays = [30, 45, 25, 75]  # Seconds between tweets
+        # Tweets share the 'twitter' rate limit bucket; rate limit hits back off
+        self.tweet_limiter = get_limiter('twitter')
+        self.tweet_backoff = Backoff(base=60, cap=900)
 
     def post_tweet_with_retry(self, message, max_retries=3):
         """Post tweet with retry mechanism"""
         for attempt in range(max_retries):
+            self.tweet_limiter.acquire()
             try:
                 tweet = self.client.create_tweet(text=message)
                 self.logger.info(f"Tweet posted successfully")
                 return True
             except Exception as e:
-                if "Rate limit" in str(e):
-                    wait_time = 60 * (attempt + 1)  # Progressive waiting: 60s, 120s, 180s
-                    self.logger.warning(f"Rate limit hit, waiting {wait_time} seconds...")
+                if "Rate limit" in str(e) or "429" in str(e):
+                    wait_time = self.tweet_backoff.delay(attempt, self._rate_limit_reset(e))
+                    self.logger.warning(f"Rate limit hit, waiting {wait_time:.0f} seconds...")
                     time.sleep(wait_time)
                 else:
                     self.logger.error(f"Failed to tweet: {e}")
                     return False
         return False
 
+    @staticmethod
+    def _rate_limit_reset(error):
+        """Seconds until Twitter lifts a rate limit, from the error response headers"""
+        headers = getattr(getattr(error, 'response', None), 'headers', None) or {}
+        if 'x-rate-limit-reset' in headers:
+            return max(0.0, float(headers['x-rate-limit-reset']) - time.time())
+        return parse_retry_after(headers.get('Retry-After'))
+
+    def build_alert_matcher(self):
+        """(Re)compile the matcher after tracked_entities or silk_road_wallets change"""
+        # Label order is precedence: Silk Road wallets first, then entity categories
+        patterns = {'silk_road': self.silk_road_wallets}
+        patterns.update(self.tracked_entities)
+        self.alert_matcher = PatternMatcher(patterns)
+        self.silk_road_addresses = frozenset(wallet.lower() for wallet in self.silk_road_wallets)
+
+        # Let the tracker pass smaller movements of these wallets only
+        high_risk = set(self.tracked_entities['high_risk'])
+        high_risk_addresses = [
+            address
+            for entity, info in self.btc_monitor.known_addresses.items() if entity in high_risk
+            for address in info['addresses']
+        ]
+        self.btc_monitor.watch_addresses(high_risk_addresses, self.alert_thresholds['high_risk'])
+        self.btc_monitor.watch_addresses(self.silk_road_wallets, self.alert_thresholds['silk_road'])
+
+    def match_categories(self, message):
+        """Every category whose wallets or entity names appear in the message"""
+        return self.alert_matcher.match(message)
+
     def filter_important_transactions(self, message):
+        """Enhanced filter to check for all important entities and Silk Road wallets"""
+        categories = self.match_categories(message)
+        return categories[0] if categories else False
+
+    def price_bar_updates(self):
+        """Price bar tweets for every configured asset"""
+        bars = build_price_bars(self.price_bar_assets)
+        return [bars[asset] for asset in self.price_bar_assets if asset in bars]
+
+    def record_category(self, record):
+        """Alert category of a BTC record, or None if it is below that category's threshold.
+
+        Works on the record alone, so unwanted movements are dropped before
+        they are formatted.
+        """
+        # Alerts name entities, not addresses: check the wallets directly
+        if (record.sender.lower() in self.silk_road_addresses
+                or record.receiver.lower() in self.silk_road_addresses):
+            category = 'silk_road'
+        else:
+            names = ' '.join(entity.name for entity in (record.from_entity, record.to_entity) if entity)
+            category = self.filter_important_transactions(names)
+        if not category:
+            return None
+        if record.btc_volume < self.alert_thresholds.get(category, self.alert_thresholds['normal']):
+            return None
+        return category
+
+    def wants_record(self, record):
+        """AlertEngine record filter: BTC records must pass their category threshold"""
+        return record.token != 'BTC' or self.record_category(record) is not None
+
+    def queue_alert(self, message, record=None):
+        """Queue a whale alert by category and size; returns True if queued"""
+        if record is not None and record.token == 'BTC':
+            category = self.record_category(record)
+        else:
+            category = self.filter_important_transactions(message)
+        if not category:
+            return False
         
+        size = 0
+        if record is not None:
+            if record.token == 'BTC':
+                size = record.amount * get_price('BTC', 0.0)
+            else:
+                size = record.amount  # stablecoins, ~1 USD each
         
-        """Enhanced filter to check for all important entities and Silk Road wallets"""
-        # First check Silk Road wallets
-        if any(wallet in message.lower() for wallet in self.silk_road_wallets):
-            return "silk_road"
-            
-        # Then check other tracked entities
-        for category, entities in self.tracked_entities.items():
-            if any(entity.lower() in message.lower() for entity in entities):
-                return category
-        return False
+        priority = self.category_priority.get(category, len(self.category_priority))
+        queued = self.tweet_queue.put(message, priority, size)
+        if queued:
+            self.logger.info(f"Queued alert for category: {category}")
+        return queued
+
+    def dispatch_alert(self, message, item=None):
+        """AlertEngine dispatch: whale alerts by priority, price bars last"""
+        if isinstance(item, AlertRecord):
+            return self.queue_alert(message, item)
+        return self.tweet_queue.put(message, self.price_bar_priority)
 
     def handle_btc_updates(self, updates):
-        """Post BTC updates with priority handling"""
+        """Queue BTC updates (AlertRecords or rendered messages) with priority handling"""
         if not updates:
             return False
+        if not isinstance(updates, list):
+            updates = [updates]
             
-        transactions_posted = False
-        if isinstance(updates, list):
-            for update in updates:
-                category = self.filter_important_transactions(update)
-                if category:
-                    if self.post_tweet_with_retry(update):
-                        transactions_posted = True
-                        self.logger.info(f"Posted BTC transaction immediately for category: {category}")
-                        time.sleep(30)  # Brief delay between multiple tweets
-            return transactions_posted
-        elif self.filter_important_transactions(updates):
-            return self.post_tweet_with_retry(updates)
-        return False
+        transactions_queued = False
+        for update in updates:
+            if isinstance(update, AlertRecord):
+                if not self.wants_record(update):
+                    continue
+                queued = self.queue_alert(self.btc_monitor.print_transaction(update), update)
+            else:
+                queued = self.queue_alert(update)
+            transactions_queued = transactions_queued or queued
+        return transactions_queued
+
+    def run_async(self, eth_monitor=None, mempool_interval=5, push=True):
+        """Watch BTC (and ETH, if a USDTWhaleTracker is given) concurrently on one event loop.
+
+        Unless ``mempool_interval`` is None, BTC whales are also alerted from
+        the mempool as soon as they are broadcast. With ``push`` blocks and
+        mempool transactions arrive over the WebSocket feed, falling back to
+        polling when it is unavailable.
+        """
+        self.tweet_queue.start()
+        btc_feed = None
+        if push:
+            btc_feed = PushFeed(self.btc_monitor, subscribe_mempool=mempool_interval is not None)
+        engine = AlertEngine(
+            post=self.post_tweet_with_retry,
+            btc_tracker=self.btc_monitor,
+            eth_tracker=eth_monitor,
+            price_bars=[(self.price_bar_updates, 420)],
+            dispatch=self.dispatch_alert,
+            record_filter=self.wants_record,
+            mempool_interval=mempool_interval,
+            btc_feed=btc_feed
+        )
+        engine.start()
 
     def run(self):
-        """Main bot loop with immediate transaction posting"""
+        """Main bot loop; the tweet queue worker posts alerts by priority"""
         self.logger.info("Starting Alert Shark Bot...")
+        self.tweet_queue.start()
         
         while True:
             try:
-                # 1. BTC Price Bar update
-                self.logger.info("Getting BTC price bar update...")
-                btc_price_update = btc_price_bar()
-                if btc_price_update:
-                    self.post_tweet_with_retry(btc_price_update)
-                time.sleep(120)  # Standard 2-minute wait after price update
-
-                # 2. BTC Monitor updates - Post immediately when found
+                # 1. Price bar updates for every asset, from one price fetch
+                self.logger.info("Getting price bar updates...")
+                for price_update in self.price_bar_updates():
+                    self.tweet_queue.put(price_update, self.price_bar_priority)
+
+                # 2. BTC Monitor updates - queued ahead of price bars by category
                 self.logger.info("Checking for BTC transactions...")
-                btc_updates = self.btc_monitor.monitor_transactions()
+                btc_updates = list(self.btc_monitor.iter_whale_transactions(max_polls=1))
                 if btc_updates:
                     self.handle_btc_updates(btc_updates)
-                    # No additional wait if transactions found - move directly to next update
-                self.logger.info("Moving to ETH price update...")
-
-                # 3. ETH Price Bar update
-                self.logger.info("Getting ETH price bar update...")
-                eth_update = eth_price_bar()
-                if eth_update:
-                    self.post_tweet_with_retry(eth_update)
-                time.sleep(300)  # Standard 5-minute wait after ETH update
+                time.sleep(300)  # Standard 5-minute wait between cycles
 
             except Exception as e:
                 self.logger.error(f"Error in main loop: {e}")
                 time.sleep(60)
 
-if __name__ == "__main__":
+def main():
+    """Watch BTC and ETH on the asyncio engine; ``--sync`` runs the BTC-only polling loop"""
     bot = AlertSharkBot()
-    bot.run()
+    if '--sync' in sys.argv[1:]:
+        bot.run()
+        return
+    # Imported here: the ETH tracker needs the Etherscan key in keys.py
+    from usdt_monitor import USDTWhaleTracker
+    eth_monitor = USDTWhaleTracker(
+        min_usdt=1000000,
+        checkpoint_store=bot.checkpoint_store,
+        rpc_url=os.environ.get('ETH_RPC_URL')  # eth_getLogs instead of Etherscan, when set
+    )
+    bot.run_async(eth_monitor=eth_monitor)
+
+if __name__ == "__main__":
+    main()
@@ -1,18 +1,37 @@
-import requests
+import http_client
 import time
 import logging
+import threading
 from datetime import datetime
 from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
 from keys import YOUR_ETHERSCAN_API_KEY
+from address_index import AddressIndex
+from recent_set import RecentSet
+from rate_limiter import Backoff
+import erc20_logs
+from amounts import to_base_units
+from alert_record import AlertRecord, as_entity
 
 class USDTWhaleTracker:
-    def __init__(self, min_usdt=2000):
+    def __init__(self, min_usdt=2000, checkpoint_store=None, rpc_url=None):
         self.base_url = "https://api.etherscan.io/api"
+        # With a JSON-RPC node configured, transfers come from one eth_getLogs
+        # call per block range instead of one tokentx call per contract
+        self.rpc_url = rpc_url
+        self.log_range_size = 100  # max blocks per eth_getLogs request; halved on result caps
         self.min_usdt = min_usdt
         self.last_block = None
-        self.processed_blocks = set()
+        self.processed_blocks = RecentSet(1000)
         self.api_key = YOUR_ETHERSCAN_API_KEY
         
+        # Resume from the last persisted block, if any
+        self.checkpoint_store = checkpoint_store
+        if checkpoint_store:
+            cursor = checkpoint_store.get_cursor('eth')
+            if cursor:
+                self.last_block = cursor[0]
+        
         # Only ETH stablecoins
         self.stablecoin_contracts = {
             'usdt_ethereum': '0xdac17f958d2ee523a2206206994597c13d831ec7',  # Ethereum USDT
@@ -252,6 +271,9 @@ class USDTWhaleTracker:
             }
         })
 
+        # Frozen lowercase lookup table, built once
+        self.build_address_index()
+
         # Setup logging
         logging.basicConfig(
             level=logging.INFO,
@@ -263,22 +285,40 @@ class USDTWhaleTracker:
         )
         self.logger = logging.getLogger('USDTMonitor')
         self.retry_count = 3    
-        self.retry_delay = 5
-        self.rate_limit_delay = 0.2
+        self.backoff = Backoff(base=1, cap=30)  # jittered exponential retry delays
+        
+        # Incremental scanning state
+        self.initial_lookback = 10  # blocks scanned on the very first poll
+        self.page_size = 1000
+        self.seen_transfers = RecentSet(50000)  # (hash, logIndex) already handled
+        self.max_catch_up_blocks = 1000  # blocks requested per poll; longer gaps take several polls
+        self.last_fetch_complete = True
+        self.fetched_through = None  # every transfer up to this block has been fetched
+        self.fetch_lock = threading.Lock()  # contracts report back from worker threads
+        
+        # Contracts are fetched concurrently, sharing the 'etherscan' rate limit bucket
+        self.concurrent_fetch = True
+        self.fetch_workers = 4
 
     def  get_latest_block(self):
         """Get latest Ethereum block with retry mechanism"""
         for attempt in range(self.retry_count):
             try:
                 print("Checking latest block...") # Debug output
-                response = requests.get(
+                if self.rpc_url:
+                    current_block = erc20_logs.get_block_number(self.rpc_url)
+                    print(f"Found block: {current_block}") # Debug output
+                    return current_block
+                
+                response = http_client.get(
                     self.base_url,
                     params={
                         "module": "proxy",
                         "action": "eth_blockNumber",
                         "apikey": self.api_key
                     },
-                    timeout=10
+                    timeout=10,
+                    api='etherscan'
                 )
                 
                 if response.status_code == 200:
@@ -288,81 +328,235 @@ class USDTWhaleTracker:
                         print(f"Found block: {current_block}") # Debug output
                         return current_block
                     print(f"API Error: {data.get('message', 'Unknown error')}")
-                time.sleep(self.rate_limit_delay)
                 
             except Exception as e:
                 print(f"Error getting latest block: {e}")
-                if attempt < self.retry_count - 1:
-                    time.sleep(self.retry_delay)
+            
+            if attempt < self.retry_count - 1:
+                time.sleep(self.backoff.delay(attempt))
         return None
 
     def get_transfers(self, block_number):
-        """Get stablecoin transfers from block"""
-        transfers = []
+        """Get stablecoin transfers in the blocks since the last fully processed one.
+
+        At most ``max_catch_up_blocks`` blocks are requested per call. Sets
+        ``fetched_through`` to the last block whose transfers were all
+        fetched (the cursor may advance that far) and ``last_fetch_complete``
+        to whether that reached ``block_number``.
+        """
+        # Only request blocks we have not fully processed yet
+        if self.last_block is None:
+            start_block = block_number - self.initial_lookback
+        else:
+            start_block = self.last_block + 1
+        end_block = min(block_number, start_block + self.max_catch_up_blocks - 1)
+        self.fetched_through = end_block
+        self.last_fetch_complete = end_block == block_number
+        if start_block > end_block:
+            return []
+        
+        if self.rpc_url:
+            return self._collect_new([self._fetch_log_transfers(start_block, end_block)])
         
-        for token_name, contract in self.stablecoin_contracts.items():
+        contracts = list(self.stablecoin_contracts.items())
+        
+        def fetch(item):
+            token_name, contract = item
             print(f"\nChecking {token_name}...")
             try:
-                params = {
-                    "module": "account",
-                    "action": "tokentx",
-                    "contractaddress": contract,
-                    "startblock": str(block_number - 10),
-                    "endblock": str(block_number),
-                    "apikey": self.api_key,
-                    "sort": "desc"
-                }
-                
-                response = requests.get(
-                    self.base_url,
-                    params=params,
-                    timeout=10
-                )
-                
-                if response.status_code == 200:
-                    data = response.json()
-                    if data['status'] == '1' and data['result']:
-                        for tx in data['result']:
-                            amount = float(tx['value']) / 1e6
-                            if amount >= self.min_usdt:
-                                transfers.append({
-                                    'token': 'USDT' if 'usdt' in token_name else 'USDC',
-                                    'hash': tx['hash'],
-                                    'from': tx['from'],
-                                    'to': tx['to'],
-                                    'amount': amount,
-                                    'timestamp': int(tx['timeStamp'])
-                                })
-                                print(f"Found transfer: ${amount:,.2f}")
-                                
-                time.sleep(self.rate_limit_delay)
-                
+                return self._fetch_contract_transfers(token_name, contract, start_block, end_block)
             except Exception as e:
                 print(f"Error checking {token_name}: {e}")
-                continue
+                self._fetch_stopped_at(start_block - 1)
+                return []
+        
+        # Fan out across contracts; the shared rate limiter keeps us under the API cap
+        if self.concurrent_fetch and len(contracts) > 1:
+            with ThreadPoolExecutor(max_workers=min(self.fetch_workers, len(contracts))) as executor:
+                results = list(executor.map(fetch, contracts))
+        else:
+            results = [fetch(item) for item in contracts]
+        return self._collect_new(results)
+
+    def _fetch_stopped_at(self, block):
+        """Record that transfers after ``block`` were not (all) fetched"""
+        with self.fetch_lock:
+            if block < self.fetched_through:
+                self.fetched_through = block
+                self.last_fetch_complete = False
+
+    def _collect_new(self, results):
+        """Flatten per-source transfer lists, dropping ones handled before"""
+        transfers = []
+        for contract_transfers in results:
+            for transfer in contract_transfers:
+                # The same transfer can be served again on a later request
+                if not self.seen_transfers.add((transfer.tx_hash, transfer.log_index)):
+                    continue
+                transfers.append(transfer)
+                print(f"Found transfer: ${transfer.amount:,.2f}")
                 
         return transfers
 
+    def _fetch_contract_transfers(self, token_name, contract, start_block, end_block):
+        """Fetch every page of tokentx results for one contract above the threshold.
+
+        Etherscan serves at most 10,000 results per query. When a range holds
+        more, only the blocks before the last one returned are complete: later
+        transfers are dropped and ``fetched_through`` is lowered so the next
+        poll resumes there.
+        """
+        transfers = []
+        page = 1
+        attempt = 0
+        token = self._token_symbol(token_name)
+        min_units = to_base_units(self.min_usdt, token)
+        
+        while True:
+            params = {
+                "module": "account",
+                "action": "tokentx",
+                "contractaddress": contract,
+                "startblock": str(start_block),
+                "endblock": str(end_block),
+                "page": str(page),
+                "offset": str(self.page_size),
+                "apikey": self.api_key,
+                "sort": "asc"
+            }
+            
+            response = http_client.get(
+                self.base_url,
+                params=params,
+                timeout=10,
+                api='etherscan'
+            )
+            response.raise_for_status()
+            data = response.json()
+            
+            if data['status'] != '1':
+                # An empty range is reported as status 0 too
+                if data.get('message') == 'No transactions found':
+                    return transfers
+                # Etherscan reports its rate limit in the body of a 200 response
+                if 'rate limit' in str(data.get('result', '')).lower() and attempt < self.retry_count:
+                    time.sleep(self.backoff.delay(attempt))
+                    attempt += 1
+                    continue
+                raise RuntimeError(f"API Error: {data.get('message', 'Unknown error')} {data.get('result', '')}")
+            attempt = 0
+            
+            results = data['result']
+            for tx in results:
+                value = int(tx['value'])
+                if value >= min_units:
+                    transfers.append(AlertRecord(
+                        token, tx['hash'], int(tx['timeStamp']), tx['from'], tx['to'], value,
+                        log_index=tx.get('logIndex'),
+                        block=int(tx['blockNumber'])
+                    ))
+            
+            if len(results) < self.page_size:
+                return transfers
+            # Etherscan caps page * offset at 10,000 results
+            if page * self.page_size >= 10000:
+                last_block = int(results[-1]['blockNumber'])
+                if last_block <= start_block:
+                    # A single block over the cap: nothing smaller to ask for
+                    self.logger.warning(f"{token_name}: block {last_block} exceeds the 10,000 result cap")
+                    return transfers
+                self.logger.warning(f"{token_name}: result cap hit, resuming from block {last_block} next poll")
+                self._fetch_stopped_at(last_block - 1)
+                return [transfer for transfer in transfers if transfer.block < last_block]
+            page += 1
+
+    def _fetch_log_transfers(self, start_block, end_block):
+        """Fetch Transfer logs of every tracked contract above the threshold.
+
+        Ranges are fetched in order. One the node refuses as too large (its
+        result cap) is split in half and retried. On any other failure the
+        transfers of the ranges already done are kept and ``fetched_through``
+        is lowered to the last of them.
+        """
+        tokens = {
+            contract.lower(): self._token_symbol(token_name)
+            for token_name, contract in self.stablecoin_contracts.items()
+        }
+        min_units = {token: to_base_units(self.min_usdt, token) for token in tokens.values()}
+        transfers = []
+        
+        # Stack of ranges still to fetch, lowest on top
+        ranges = [
+            (range_start, min(end_block, range_start + self.log_range_size - 1))
+            for range_start in range(start_block, end_block + 1, self.log_range_size)
+        ]
+        ranges.reverse()
+        while ranges:
+            range_start, range_end = ranges.pop()
+            try:
+                logs = erc20_logs.get_transfer_logs(self.rpc_url, tokens, range_start, range_end)
+            except Exception as e:
+                if erc20_logs.is_range_error(e) and range_end > range_start:
+                    middle = (range_start + range_end) // 2
+                    ranges.append((middle + 1, range_end))
+                    ranges.append((range_start, middle))
+                    continue
+                print(f"Error fetching transfer logs for blocks {range_start}-{range_end}: {e}")
+                self._fetch_stopped_at(range_start - 1)
+                return transfers
+            
+            columns = erc20_logs.decode_transfer_logs(logs)
+            now = int(time.time())
+            for i, value in enumerate(columns['value']):
+                token = tokens[columns['contract'][i]]
+                if value >= min_units[token]:
+                    transfers.append(AlertRecord(
+                        token, columns['hash'][i], columns['timestamp'][i] or now,
+                        columns['from'][i], columns['to'][i], value,
+                        log_index=columns['log_index'][i],
+                        block=columns['block'][i]
+                    ))
+        return transfers
+
+    @staticmethod
+    def _token_symbol(token_name):
+        """'usdt_ethereum' -> 'USDT'"""
+        return token_name.split('_')[0].upper()
+
+    def build_address_index(self):
+        """(Re)build the address index after known_addresses changes"""
+        self.address_index = AddressIndex(self.known_addresses)
+
     def identify_address(self, address):
         """Identify address from known addresses"""
-        for entity, info in self.known_addresses.items():
-            if address.lower() in [addr.lower() for addr in info['addresses']]:
-                return {'name': entity, 'type': info['type']}
+        label = self.address_index.lookup(address)
+        if label:
+            return {'name': label[0], 'type': label[1]}
         return None
 
+    def identify_many(self, addresses):
+        """Identify a batch of addresses, preserving input order"""
+        return [
+            {'name': label[0], 'type': label[1]} if label else None
+            for label in self.address_index.lookup_many(addresses)
+        ]
+
     def format_transfer_message(self, transfer):
         """Format transfer message with whale alert style"""
         # Determine number of alert emojis based on amount
-        alert_count = min(3, max(1, int(transfer['amount'] / 1000000)))
+        amount = transfer.amount
+        alert_count = min(3, max(1, int(amount / 1000000)))
         alerts = "🚨" * alert_count
         
-        # Get entity names
-        from_entity = self.identify_address(transfer['from'])
-        to_entity = self.identify_address(transfer['to'])
+        # Get entity names, kept on the record as shared Entity references
+        if transfer.from_entity is None and transfer.to_entity is None:
+            from_info, to_info = self.identify_many([transfer.sender, transfer.receiver])
+            transfer.from_entity, transfer.to_entity = as_entity(from_info), as_entity(to_info)
+        from_entity, to_entity = transfer.from_entity, transfer.to_entity
         
         # Format entity names
-        from_name = from_entity['name'] if from_entity else "unknown"
-        to_name = to_entity['name'] if to_entity else "unknown"
+        from_name = from_entity.name if from_entity else "unknown"
+        to_name = to_entity.name if to_entity else "unknown"
         
         # Determine transfer type
         if not from_entity or not to_entity:
@@ -371,11 +565,11 @@ class USDTWhaleTracker:
             tx_type = "internal transfer"
         
         # Calculate USD amount (assuming USDT/USDC = $1)
-        usd_amount = transfer['amount']
+        usd_amount = amount
         
         # Format message
         message = (
-            f"{alerts} {transfer['amount']:.0f} #{transfer['token'].lower()} "
+            f"{alerts} {amount:.0f} #{transfer.token.lower()} "
             f"(${usd_amount:,.0f} USD) transferred ({tx_type}) "
             f"from #{from_name} to #{to_name} "
             f"for a ${(float(transfer.get('fee', '0.000024')) * 40000):,.0f} fee"
@@ -383,6 +577,28 @@ class USDTWhaleTracker:
         
         return message
 
+    def check_new_transfers(self):
+        """Fetch transfers for the latest block once"""
+        current_block = self.get_latest_block()
+        if not current_block:
+            return []
+        transfers = self.get_transfers(current_block)
+        
+        if self.checkpoint_store:
+            # Drop alerts already sent before a restart
+            transfers = [
+                transfer for transfer in transfers
+                if self.checkpoint_store.mark_alerted('eth', f"{transfer.tx_hash}:{transfer.log_index}")
+            ]
+        
+        # Only advance the cursor past blocks every contract was fully fetched for
+        fetched_through = self.fetched_through
+        if self.last_block is None or fetched_through > self.last_block:
+            self.last_block = fetched_through
+            if self.checkpoint_store:
+                self.checkpoint_store.set_cursor('eth', fetched_through)
+        return transfers
+
     def monitor_transfers(self):
         """Monitor Ethereum transfers"""
         print("Starting Ethereum monitoring...")
@@ -391,6 +607,7 @@ class USDTWhaleTracker:
         
         last_check_time = 0
         check_interval = 5
+        errors = 0
         
         while True:
             try:
@@ -399,23 +616,22 @@ class USDTWhaleTracker:
                     time.sleep(1)
                     continue
                 
-                current_block = self.get_latest_block()
-                if current_block:
-                    transfers = self.get_transfers(current_block)
-                    
-                    if transfers:
-                        print(f"\nFound {len(transfers)} transfers")
-                        for transfer in transfers:
-                            message = self.format_transfer_message(transfer)
-                            print(message)
-                            print("-" * 80)
+                transfers = self.check_new_transfers()
+                if transfers:
+                    print(f"\nFound {len(transfers)} transfers")
+                    for transfer in transfers:
+                        message = self.format_transfer_message(transfer)
+                        print(message)
+                        print("-" * 80)
                     
                 last_check_time = current_time
+                errors = 0
                 
             except Exception as e:
                 print(f"Monitor error: {str(e)}")
                 self.logger.error(f"Monitor error: {str(e)}")
-                time.sleep(self.retry_delay)
+                time.sleep(self.backoff.delay(errors))
+                errors += 1
 
 if __name__ == "__main__":
     try: